@@ -17,6 +17,12 @@ if [[ $1 == "-t" ]]; then
     exit 99
 fi
 
+# -p profiles the start up and writes a report to logs/startup-*.txt
+program_args=''
+if [[ $1 == "-p" ]]; then
+    program_args='--profile-startup'
+fi
+
 ascii="
                               
      :;;\`
@@ -98,7 +104,7 @@ printf "OS Check: ${OK}[PASS]${NC}\n\n"
 
 printf "Attempting to run ${program_path}\n\n"
 
-sudo python3 ${program_path} 2> ${traceback_path}
+sudo python3 ${program_path} ${program_args} 2> ${traceback_path}
 if [[ $? == '1' ]]; then
 	traceback=$( tail -1 ${traceback_path} )
 	printf "${traceback}\n"
@@ -0,0 +1,147 @@
+import time
+from tkinter import TclError
+
+import numpy as np
+
+# Time budget for a single graph update, in seconds
+FRAME_BUDGET = 0.015
+
+# Fraction of the axis span added around the data when the axes are rescaled
+MARGIN = 0.1
+
+
+class BlitRenderer:
+    """
+    Incremental renderer for live graphs.
+
+    The Line2D artists are created once and marked animated, so a full canvas draw only paints the static parts of the
+    figure (axes, ticks, labels). That background is cached on every draw_event, and each update restores it, draws
+    the lines on top and blits the result. A full draw only happens when the data leaves the current axis limits.
+    """
+
+    def __init__(self, figure):
+        """
+        Init method
+        :param figure: matplotlib Figure that has been attached to a canvas
+        """
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.lines = []
+        self._background = None
+
+        # Frame timing, checked against FRAME_BUDGET
+        self.last_frame_time = 0.0
+        self.frames = 0
+        self.frames_over_budget = 0
+
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def add_line(self, axes, color):
+        """
+        Creates an animated line on the given axes
+        :param axes: Axes to draw the line on
+        :param color: matplotlib color string
+        :return: The Line2D artist
+        """
+        line, = axes.plot([], [], color, animated=True, antialiased=False)
+        self.lines.append(line)
+        return line
+
+    def is_visible(self):
+        """
+        :return: False if the canvas is unmapped, iconified or destroyed, so there is nothing to repaint
+        """
+        get_tk_widget = getattr(self.canvas, "get_tk_widget", None)
+        if get_tk_widget is None:
+            return True
+
+        try:
+            return bool(get_tk_widget().winfo_viewable())
+        except TclError:
+            return False
+
+    def update(self, values, x_values=None, x_range=None):
+        """
+        Replaces the data of every line and redraws the figure
+        :param values: One sequence of y values per line, in the order the lines were added
+        :param x_values: One sequence of x values per line, e.g. the sample indices a decimated line kept. Defaults
+                         to 0, 1, 2... for every line
+        :param x_range: Fixed (low, high) limits of the x axes, by default they grow from 0 with the data
+        :return: None
+        """
+        start = time.perf_counter()
+
+        rescale = self._background is None
+        if x_values is None:
+            x_values = [np.arange(len(y)) for y in values]
+        for line, x, y in zip(self.lines, x_values, values):
+            line.set_data(x, y)
+
+        for axes in self._axes():
+            rescale = self._fit_limits(axes, x_range) or rescale
+
+        if rescale:
+            # Triggers _on_draw, which caches the new background and draws the lines
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_lines()
+            self.canvas.blit(self.figure.bbox)
+
+        self.last_frame_time = time.perf_counter() - start
+        self.frames += 1
+        if self.last_frame_time > FRAME_BUDGET:
+            self.frames_over_budget += 1
+
+    def _axes(self):
+        axes = []
+        for line in self.lines:
+            if line.axes not in axes:
+                axes.append(line.axes)
+        return axes
+
+    def _fit_limits(self, axes, x_range=None):
+        """
+        Moves the limits of an axes only if its data left them, or shrank to a small part of them
+        :param axes: Axes to check
+        :param x_range: Fixed x limits, or None
+        :return: True if the limits changed
+        """
+        lines = [line for line in self.lines if line.axes is axes and len(line.get_ydata())]
+        if not lines:
+            return False
+
+        x_max = max(np.max(line.get_xdata()) for line in lines)
+        y_min = min(np.min(line.get_ydata()) for line in lines)
+        y_max = max(np.max(line.get_ydata()) for line in lines)
+        if not (np.isfinite(y_min) and np.isfinite(y_max)):
+            return False
+
+        changed = False
+
+        # The x axis only ever grows, in doubling steps, so a filling history rescales a handful of times
+        x_low, x_high = axes.get_xlim()
+        if x_range is not None:
+            if (x_low, x_high) != tuple(x_range):
+                axes.set_xlim(*x_range)
+                changed = True
+        elif x_max > x_high or x_low != 0:
+            axes.set_xlim(0, max(2 * x_high, x_max, 1))
+            changed = True
+
+        y_low, y_high = axes.get_ylim()
+        pad = max((y_max - y_min) * MARGIN, 1e-3)
+        fitted_span = y_max - y_min + 2 * pad
+        if y_min < y_low or y_max > y_high or fitted_span < (y_high - y_low) / 4:
+            axes.set_ylim(y_min - pad, y_max + pad)
+            changed = True
+
+        return changed
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for line in self.lines:
+            self.figure.draw_artist(line)
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class CommandStatus(Enum):
+    ACKNOWLEDGED = "ACKNOWLEDGED"
+    SENT = "SENT"
+    FAILED = "FAILED"
+    TIMEOUT = "TIMEOUT"
+    DISCARDED = "DISCARDED"
@@ -1,9 +1,32 @@
 #! /usr/bin/python3.6
+import itertools
 import json
+import queue
+import threading
+import time
 
 from Mode import Mode
+from CommandStatus import CommandStatus
 from communications.RadioModule import Module
 
+# Command priorities, lower values are sent first
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+
+# Commands that go through the critical lane, which never waits behind other commands
+CRITICAL_COMMANDS = ("qdm", "abort", "cdm")
+
+# Set once the platform firmware echoes command ids back as {"origin": "ack", "id": ...} packets. Until then a
+# command succeeds as soon as the radio has transmitted it
+ACK_REQUIRED = False
+
+# Transmit attempts per command, seconds to wait for an acknowledgement, and the retry backoff in seconds
+MAX_ATTEMPTS = 3
+ACK_TIMEOUT = 2.0
+BACKOFF = 0.25
+MAX_BACKOFF = 2.0
+
 
 class Comm:
     __instance = None
@@ -20,11 +43,175 @@ class Comm:
             Comm.__instance = CommSingleton()
 
 
+class Command:
+    """
+    One outbound command and its delivery state
+    """
+
+    def __init__(self, command_id, command, payload, priority, callback, require_ack):
+        self.command_id = command_id
+        self.command = command
+        self.payload = payload
+        self.priority = priority
+        self.callback = callback
+        self.require_ack = require_ack
+
+        self.attempts = 0
+        self.status = None
+        self.acknowledged = threading.Event()
+
+
+class CommandQueue:
+    """
+    Outbound command pipeline.
+
+    Commands are queued by priority and transmitted by worker threads, so a Tk callback never waits on the radio.
+    Critical commands (QDM, abort) have their own lane and worker, so they are never stuck behind a non-critical send
+    that is stalled on the sync timeout. Both lanes wait for the radio's transmit status, so a critical command that
+    was not delivered is retried and reported as failed rather than counted as sent once it is queued locally.
+    Each command is retried with exponential backoff until it is transmitted (and acknowledged, if required) or runs
+    out of attempts. Results are collected on a queue and handed to the callbacks on the Tk thread by
+    dispatch_results().
+    """
+
+    def __init__(self, send):
+        """
+        Init method
+        :param send: Callable(payload, wait) that transmits a payload, returns 1 on success
+        """
+        self._send = send
+        self._order = itertools.count()
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._results = queue.Queue()
+
+        self.transmitted = 0
+        self.running = True
+
+        self._critical = queue.PriorityQueue()
+        self._normal = queue.PriorityQueue()
+        self._workers = [threading.Thread(target=self._run, args=(self._critical,), name="CriticalCommands",
+                                          daemon=True),
+                         threading.Thread(target=self._run, args=(self._normal,), name="Commands", daemon=True)]
+        for worker in self._workers:
+            worker.start()
+
+    def put(self, command, fields, priority, callback, require_ack=None):
+        """
+        Queues a command
+        :param command: Command name, e.g. "qdm"
+        :param fields: dict sent as the JSON payload, the command id is added to it
+        :param priority: PRIORITY_CRITICAL, PRIORITY_HIGH or PRIORITY_NORMAL
+        :param callback: Called on the Tk thread with (Command, CommandStatus) once delivery finished, may be None
+        :param require_ack: Only succeed once the platform acknowledged the command id, defaults to ACK_REQUIRED
+        :return: The queued Command
+        """
+        if require_ack is None:
+            require_ack = ACK_REQUIRED
+
+        command_id = next(self._ids)
+        fields = dict(fields, id=command_id)
+        entry = Command(command_id, command, json.dumps(fields), priority, callback, require_ack)
+
+        with self._pending_lock:
+            self._pending[command_id] = entry
+
+        lane = self._critical if priority == PRIORITY_CRITICAL else self._normal
+        lane.put((priority, next(self._order), entry))
+        return entry
+
+    def acknowledge(self, command_id):
+        """
+        Matches an acknowledgement from the platform to its command. Safe to call from any thread
+        :param command_id: id echoed by the platform
+        :return: None
+        """
+        with self._pending_lock:
+            entry = self._pending.get(command_id)
+        if entry is not None:
+            entry.acknowledged.set()
+
+    def discard(self, command, fields, callback):
+        """
+        Reports a command as discarded without sending it
+        :return: None
+        """
+        entry = Command(None, command, json.dumps(fields), PRIORITY_NORMAL, callback, False)
+        entry.status = CommandStatus.DISCARDED
+        self._results.put(entry)
+
+    def dispatch_results(self):
+        """
+        Hands finished commands to their callbacks. Must be called on the Tk thread
+        :return: None
+        """
+        while True:
+            try:
+                entry = self._results.get_nowait()
+            except queue.Empty:
+                return
+
+            if entry.callback is not None:
+                try:
+                    entry.callback(entry, entry.status)
+                except Exception as e:
+                    print("Command Callback Error")
+                    print(e)
+
+    def close(self):
+        self.running = False
+        # The sentinel sorts after every real command
+        for lane in (self._critical, self._normal):
+            lane.put((PRIORITY_NORMAL + 1, next(self._order), None))
+
+    def _run(self, lane):
+        while self.running:
+            priority, order, entry = lane.get()
+            if entry is None:
+                return
+
+            entry.status = self._deliver(entry)
+
+            with self._pending_lock:
+                self._pending.pop(entry.command_id, None)
+            self._results.put(entry)
+
+    def _deliver(self, entry):
+        status = CommandStatus.FAILED
+        backoff = BACKOFF
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            entry.attempts = attempt
+
+            try:
+                sent = self._send(entry.payload, True)
+            except Exception as e:
+                print("Sending Err")
+                print(e)
+                sent = 0
+
+            if sent:
+                self.transmitted += 1
+                if not entry.require_ack:
+                    return CommandStatus.SENT
+                if entry.acknowledged.wait(ACK_TIMEOUT):
+                    return CommandStatus.ACKNOWLEDGED
+                status = CommandStatus.TIMEOUT
+            else:
+                status = CommandStatus.FAILED
+
+            if attempt < MAX_ATTEMPTS and self.running:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+        return status
+
+
 class CommSingleton:
     def __init__(self):
 
         self.packets_sent = 0
-        self.packets_received = 0
 
         try:
             self.__mode = Mode.STANDBY
@@ -33,6 +220,8 @@ class CommSingleton:
             print("Module Err")
             print(e)
 
+        self.commands = CommandQueue(self.__transmit)
+
     def standby(self):
         self.__mode = Mode.STANDBY
 
@@ -59,20 +248,21 @@ class CommSingleton:
     def get_packets_sent(self):
         return self.packets_sent
 
-    def get_packets_received(self):
-        return self.packets_received
-
     def reset_counters(self):
         self.packets_sent = 0
-        self.packets_received = 0
 
-    def send(self, command):
-        self.packets_sent += 1
+    def send(self, command, callback=None, priority=None):
+        """
+        Queues a command for the radio and returns immediately. The payload is built with the current mode
+        :param command: Command name
+        :param callback: Called on the Tk thread with (Command, CommandStatus) once delivery finished
+        :param priority: Defaults to PRIORITY_CRITICAL for CRITICAL_COMMANDS and PRIORITY_NORMAL otherwise
+        :return: The queued Command, or None if it was discarded
+        """
         print("Sending...")
 
-        if self.__mode == Mode.STANDBY:
-            # discard command
-            print("\nStandby, command discarded.\n")
+        if priority is None:
+            priority = PRIORITY_CRITICAL if command.lower() in CRITICAL_COMMANDS else PRIORITY_NORMAL
 
         command_json = {}
         if self.__mode == Mode.TESTING:
@@ -83,17 +273,29 @@ class CommSingleton:
             command_json["mode"] = "flight"
             command_json["command"] = command
 
-        try:
-            if not len(command_json) == 0:
-                print(command_json)
+        if len(command_json) == 0:
+            # discard command
+            print("\nStandby, command discarded.\n")
+            self.commands.discard(command, command_json, callback)
+            return None
 
-                sent = self.__radio.send(json.dumps(command_json))
-                self.packets_received += 1 
-                return sent
-        except Exception as e:
-            print("Sending Err")
-            print(e)
-            return 0
+        print(command_json)
+        return self.commands.put(command, command_json, priority, callback)
+
+    def acknowledge(self, command_id):
+        self.commands.acknowledge(command_id)
+
+    def dispatch_results(self):
+        self.commands.dispatch_results()
+
+    def close(self):
+        self.commands.close()
+
+    def __transmit(self, payload, wait):
+        sent = self.__radio.send(payload, wait)
+        if sent:
+            self.packets_sent += 1
+        return sent
 
     def get_remote_node_address(self):
         self.__radio = Module.get_instance(self)
@@ -1,5 +1,17 @@
 from tkinter import *
 
+from DisplayBinding import DisplayBinding
+
+# Digits shown after the decimal point
+PRECISION = {
+    "altitude": 1,
+    "longitude": 6,
+    "latitude": 6,
+    "gyro": 2,
+    "temperature": 1,
+    "acc": 3,
+}
+
 
 class Data:
     def __init__(self, place_window, data_name, labels_column, data_column, bg):
@@ -24,10 +36,23 @@ class Data:
         self.accelX = StringVar()
         self.accelY = StringVar()
         self.accelZ = StringVar()
-        self.accelZ = StringVar()
         self.altitude = StringVar()
 
+        # Labels are only updated on flush, and only when their text changes
+        self.binding = DisplayBinding()
+        self.binding.add("longitude", self.longitude, PRECISION["longitude"])
+        self.binding.add("latitude", self.latitude, PRECISION["latitude"])
+        self.binding.add("gyroX", self.gyroX, PRECISION["gyro"])
+        self.binding.add("gyroY", self.gyroY, PRECISION["gyro"])
+        self.binding.add("gyroZ", self.gyroZ, PRECISION["gyro"])
+        self.binding.add("temperature", self.temperature, PRECISION["temperature"])
+        self.binding.add("accelX", self.accelX, PRECISION["acc"])
+        self.binding.add("accelY", self.accelY, PRECISION["acc"])
+        self.binding.add("accelZ", self.accelZ, PRECISION["acc"])
+        self.binding.add("altitude", self.altitude, PRECISION["altitude"])
+
         self.display_variables()
+        self.flush()
 
         # Create and Place Section Header
         data_label = Label(place_window, text=data_name, font=('times', 15, 'underline'), bg=bg)
@@ -75,16 +100,28 @@ class Data:
                 color_frame.grid(row=j, column=labels_column + i, sticky=N + S + E + W)
 
     def display_variables(self):
-        self.longitude.set(self.longitude_data)
-        self.latitude.set(self.latitude_data)
-        self.gyroX.set(self.gyroX_data)
-        self.gyroY.set(self.gyroY_data)
-        self.gyroZ.set(self.gyroZ_data)
-        self.temperature.set(self.temperature_data)
-        self.accelX.set(self.accelX_data)
-        self.accelY.set(self.accelY_data)
-        self.accelZ.set(self.accelZ_data)
-        self.altitude.set(self.altitude_data)
+        """
+        Stages the current data for display, flush() puts it on screen
+        :return: None
+        """
+        binding = self.binding
+        binding.set("longitude", self.longitude_data)
+        binding.set("latitude", self.latitude_data)
+        binding.set("gyroX", self.gyroX_data)
+        binding.set("gyroY", self.gyroY_data)
+        binding.set("gyroZ", self.gyroZ_data)
+        binding.set("temperature", self.temperature_data)
+        binding.set("accelX", self.accelX_data)
+        binding.set("accelY", self.accelY_data)
+        binding.set("accelZ", self.accelZ_data)
+        binding.set("altitude", self.altitude_data)
+
+    def flush(self):
+        """
+        Updates the labels whose text changed since the last flush
+        :return: Number of labels updated
+        """
+        return self.binding.flush()
 
     def reset_variables(self):
         # Resets all of the data on screen to zero
@@ -102,4 +139,4 @@ class Data:
         self.altitude_data = 0
 
         self.display_variables()
-
+        self.flush()
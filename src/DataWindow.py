@@ -1,4 +1,3 @@
-import datetime
 import time
 import os
 import queue
@@ -7,6 +6,7 @@ import string
 from tkinter import *
 from tkinter import messagebox
 from tkinter import simpledialog
+from tkinter import filedialog
 from tkinter import ttk
 import RPi.GPIO as GPIO
 
@@ -17,22 +17,53 @@ from Mode import Mode
 from Control import Control
 from StatCounter import StatCounter
 from CommunicationDriver import Comm
-from QualityCheck import QualityCheck
-from AltitudeGraph import AltitudeGraph
-from AccelerometerGyroGraphs import AccelerometerGyroGraphs
+from CommandStatus import CommandStatus
+from QualityCheck import QualityCheck, OFFLINE, ONLINE, CONNECTING
+from ConnectionState import ConnectionState
+from GraphNotebook import GraphNotebook
 from communications.RadioModule import Module
+from communications.LinkBudget import TARGET_UTILISATION
 from Timer import ShutdownTimer
+from TelemetryHistory import TelemetryHistory
+import LatencyTracker
+from RenderScheduler import RenderScheduler
+from ReplaySource import ReplaySource, AS_FAST_AS_POSSIBLE
+from FlightRecorder import LOG_FOLDER
+import Startup
+
+# Number of samples per channel kept for the graphs, in each tier of the history. At 10 Hz the raw samples reach
+# back about 7 minutes and the coarsest of GRAPH_HISTORY_LEVELS tiers about 4 days, in about 13 MB
+GRAPH_HISTORY_LENGTH = 4000
+
+# Number of aggregated tiers of the graph history
+GRAPH_HISTORY_LEVELS = 3
+
+# Maximum number of points drawn per line, the history is decimated to this or the graph's width in pixels. Keeps a
+# graph update inside BlitRenderer.FRAME_BUDGET on the Pi however long the flight
+GRAPH_POINTS = 400
+
+# Maximum number of graph repaints per second, independent of the packet rate
+GRAPH_MAX_FPS = 10
+
+# Maximum number of telemetry label updates per second, independent of the packet rate
+DISPLAY_MAX_FPS = 20
 
 
 class DataWindow:
-    def __init__(self, name, data_queue):
+    def __init__(self, name, data_queue, link_stats, recorder, latency):
         """
         Init functions that sets up the general shape and feel of the window
 
         :param name: Name of the main window
-        :param data_queue: queue used to communicate with the radio
+        :param data_queue: queue of decoded telemetry records from the TelemetryDecoder
+        :param link_stats: LinkStats of the received telemetry
+        :param recorder: FlightRecorder mission events are logged to
+        :param latency: LatencyTracker of the receive pipeline
         """
         self.queue = data_queue
+        self.link_stats = link_stats
+        self.recorder = recorder
+        self.latency = latency
         self.bg_color = "#484949"
         frames_bg = "#969694"
         self.framesBg = frames_bg
@@ -45,39 +76,39 @@ class DataWindow:
         self.start_timer = None
         self.timer = None
         self.dataRocket = None
-        self.dataRocket = None
         self.altGraph = None
         self.dataBalloon = None
+        self.display_scheduler = None
+        # Receive time of the oldest record staged for the labels since they were last updated, None if no record was
+        self.display_pending = None
         self.sixGraph = None
+        self.rocketGraph = None
+        self.temperatureGraph = None
         self.control = None
-        self.altitude_graph = None
+        self.graph_notebook = None
         self.quality_checks = None
         self.stability = None
         self.stability_button = None
         self.packets_sent = None
         self.packets_received = None
         self.received_percentage = None
+        self.link_load = None
+        self.link_load_label = None
         self.warningLabel = None
 
         # Random Vars for init_graph_stuff()
-        self.balloon_acc_xQ = None
-        self.balloon_acc_yQ = None
-        self.balloon_acc_zQ = None
-        self.balloon_gyro_xQ = None
-        self.balloon_gyro_yQ = None
-        self.balloon_gyro_zQ = None
-        self.rocket_acc_xQ = None
-        self.rocket_acc_yQ = None
-        self.rocket_acc_zQ = None
-        self.rocket_gyro_xQ = None
-        self.rocket_gyro_yQ = None
-        self.rocket_gyro_zQ = None
-        self.altitudeQ = None
-        self.acc_gyro_graphs = None
+        self.history = None
+        # Open PlotPanels by tab title
+        self.panels = {}
+        self.render_scheduler = None
+        # Receive time of the oldest record graphed since the last frame, None if no record was
+        self.render_pending = None
+
+        # Flight log being replayed
+        self.replay = None
 
         # Base file writing from program's execution directory
         program_path = os.path.dirname(os.path.realpath(__file__))
-        self.status_log_path = os.path.join(program_path, "../logs/status.log")
         self.image_folder_path = os.path.join(program_path, "../res/img")
 
         self.name = name
@@ -107,22 +138,25 @@ class DataWindow:
         # white wire
         self.gui_switch = 7
 
-        GPIO.setmode(GPIO.BOARD)
-        GPIO.setwarnings(False)
-        GPIO.setup(self.launch_signal, GPIO.IN)
-        GPIO.setup(self.on_signal, GPIO.OUT)
-        GPIO.setup(self.gui_switch, GPIO.OUT)
+        with Startup.report.phase("GPIO setup"):
+            GPIO.setmode(GPIO.BOARD)
+            GPIO.setwarnings(False)
+            GPIO.setup(self.launch_signal, GPIO.IN)
+            GPIO.setup(self.on_signal, GPIO.OUT)
+            GPIO.setup(self.gui_switch, GPIO.OUT)
 
-        GPIO.output(self.on_signal, GPIO.HIGH)
-        GPIO.output(self.on_signal, GPIO.LOW)
-        GPIO.output(self.gui_switch, GPIO.LOW)
+            GPIO.output(self.on_signal, GPIO.HIGH)
+            GPIO.output(self.on_signal, GPIO.LOW)
+            GPIO.output(self.gui_switch, GPIO.LOW)
 
-        GPIO.add_event_detect(11, GPIO.RISING, callback=self.launch)
+            GPIO.add_event_detect(11, GPIO.RISING, callback=self.launch)
 
         self.init_graph_stuff()
-        self.draw()
+        with Startup.report.phase("widgets"):
+            self.draw()
 
         self.shutdown_timer = None
+        self.shutdown_timer_restarted = 0.0
 
         # Running variable to see if program was terminated
         self.running = 1
@@ -142,6 +176,8 @@ class DataWindow:
 
         # Make data sections
         self.dataBalloon = Data(self.name, "Balloon Data", 6, 9, self.frames_bg)
+        # Pushes the staged values to the labels at most DISPLAY_MAX_FPS times a second
+        self.display_scheduler = RenderScheduler(self.name, self.flush_display, DISPLAY_MAX_FPS)
 
         # Config button styles
         ttk.Style().configure("yellow.TButton", background=self.yellow)
@@ -149,12 +185,25 @@ class DataWindow:
         # Place Graph buttons
         # self.init_graph_queues()
 
-        self.altGraph = ttk.Button(self.name, text="Altitude", style="yellow.TButton", command=self.open_altitude_graph)
+        self.altGraph = ttk.Button(self.name, text="Altitude", style="yellow.TButton",
+                                   command=lambda: self.open_graph("Altitude"))
         self.sixGraph = ttk.Button(self.name, text="Direction", style="yellow.TButton",
-                                   command=self.open_acc_gyro_graphs)
+                                   command=lambda: self.open_graph("Direction"))
+        self.rocketGraph = ttk.Button(self.name, text="Rocket", style="yellow.TButton",
+                                      command=lambda: self.open_graph("Rocket"))
+        self.temperatureGraph = ttk.Button(self.name, text="Temperature", style="yellow.TButton",
+                                           command=lambda: self.open_graph("Temperature"))
 
         self.altGraph.grid(column=6, columnspan=4, row=11, rowspan=1, sticky=N + S + E + W)
         self.sixGraph.grid(column=6, columnspan=4, row=12, rowspan=1, sticky=N + S + E + W)
+        self.rocketGraph.grid(column=6, columnspan=2, row=13, rowspan=1, sticky=N + S + E + W)
+        self.temperatureGraph.grid(column=8, columnspan=2, row=13, rowspan=1, sticky=N + S + E + W)
+
+        # Graphs open as tabs to the right of the existing grid
+        self.graph_notebook = GraphNotebook(0, 11, 200, self.total_rows, self.name)
+        # Stale graphs that were hidden are repainted once their tab is selected or the window is shown again
+        self.graph_notebook.bind("<<NotebookTabChanged>>", lambda event: self.render_scheduler.mark_dirty())
+        self.graph_notebook.bind("<Map>", lambda event: self.render_scheduler.mark_dirty())
 
         # Adds our logo
         logo = PhotoImage(file=os.path.join(self.image_folder_path, "orbital-logo-reduced.gif"))
@@ -167,6 +216,7 @@ class DataWindow:
         # Adds Radio Counters
         self.packets_sent = StatCounter(self.name, "Packets Sent", 1, 10, self.frames_bg)
         self.packets_received = StatCounter(self.name, "Packets Received", 2, 10, self.frames_bg)
+        self.packets_received.bind(self.link_stats.received)
 
         # Create received percentage
         Label(self.name, text="Percent Received", font=('times', 12, 'underline'), bg=self.frames_bg). \
@@ -178,6 +228,15 @@ class DataWindow:
         Label(self.name, textvariable=self.received_percentage, bg=self.frames_bg). \
             grid(row=11, column=3, sticky=N + E + W)
 
+        # Share of the radio link's capacity in use
+        Label(self.name, text="Link Load", font=('times', 12, 'underline'), bg=self.frames_bg). \
+            grid(row=14, column=2, sticky=S + E + W)
+
+        self.link_load = StringVar()
+        self.link_load_label = Label(self.name, textvariable=self.link_load, bg=self.frames_bg)
+        self.link_load_label.grid(row=15, column=2, sticky=N + E + W)
+        self.show_link_load()
+
         # Place Quality Indicators and Labels
         self.quality_checks = [QualityCheck(self.name, "QDM", 1, 12, self.frames_bg),
                                QualityCheck(self.name, "Ignition", 2, 12, self.frames_bg),
@@ -186,7 +245,7 @@ class DataWindow:
                                QualityCheck(self.name, "Platform Radio", 3, 14, self.frames_bg),
                                ]
 
-        self.quality_checks[3].set_quality(self.radio.is_local_device_init)
+        self.show_radio_state()
 
         # Innit the warning label
         self.warningLabel = Label(self.name, text="WARNING: TEST MODE", bg="#ff0000", relief=RAISED,
@@ -207,39 +266,18 @@ class DataWindow:
         Sets up the graphs
         :return: None
         """
-        # Create several queue that holds the number for each line in every graph
-        self.balloon_acc_xQ = queue.Queue()
-        self.balloon_acc_yQ = queue.Queue()
-        self.balloon_acc_zQ = queue.Queue()
-        self.balloon_gyro_xQ = queue.Queue()
-        self.balloon_gyro_yQ = queue.Queue()
-        self.balloon_gyro_zQ = queue.Queue()
-        self.rocket_acc_xQ = queue.Queue()
-        self.rocket_acc_yQ = queue.Queue()
-        self.rocket_acc_zQ = queue.Queue()
-        self.rocket_gyro_xQ = queue.Queue()
-        self.rocket_gyro_yQ = queue.Queue()
-        self.rocket_gyro_zQ = queue.Queue()
-        self.altitudeQ = queue.Queue()
-
-        amount_of_point_to_graph = 20
-        for i in range(0, amount_of_point_to_graph):
-            self.balloon_acc_xQ.put(0)
-            self.balloon_acc_yQ.put(0)
-            self.balloon_acc_zQ.put(0)
-            self.balloon_gyro_xQ.put(0)
-            self.balloon_gyro_yQ.put(0)
-            self.balloon_gyro_zQ.put(0)
-            self.rocket_acc_xQ.put(0)
-            self.rocket_acc_yQ.put(0)
-            self.rocket_acc_zQ.put(0)
-            self.rocket_gyro_xQ.put(0)
-            self.rocket_gyro_yQ.put(0)
-            self.rocket_gyro_zQ.put(0)
-            self.altitudeQ.put(0)
-
-        self.altitude_graph = None
-        self.acc_gyro_graphs = None
+        # Shared history that holds the points for each line in every graph
+        if self.history is None:
+            self.history = TelemetryHistory(GRAPH_HISTORY_LENGTH, GRAPH_HISTORY_LEVELS)
+        else:
+            self.history.clear()
+        self.render_pending = None
+
+        # Repaints the open graphs at most GRAPH_MAX_FPS times a second
+        if self.render_scheduler is None:
+            self.render_scheduler = RenderScheduler(self.name, self.render_graphs, GRAPH_MAX_FPS)
+        else:
+            self.graphs_changed()
 
     def make_tool_bar(self):
         """
@@ -267,8 +305,11 @@ class DataWindow:
         program_menu.add_separator()
         program_menu.add_command(label="Toggle Test Mode", command=self.alter_test_mode)
         program_menu.add_command(label="Log", command=self.log_menu)
+        program_menu.add_command(label="Replay Flight", command=self.replay_menu)
         program_menu.add_command(label="Reset Data", command=self.reset_variables_window)
         program_menu.add_command(label="Reset Radio", command=self.reset_radio)
+        program_menu.add_command(label="Link Budget", command=self.link_budget_menu)
+        program_menu.add_command(label="Diagnostics", command=self.diagnostics_window)
         program_menu.add_command(label="Change Address", command=self.change_radio_address_callback)
         program_menu.add_command(label="Manual Override", command=self.manual_override_callback)
 
@@ -319,9 +360,7 @@ class DataWindow:
         :return: None
         """
         if not self.start_timer.clock_run:
-            self.start_timer.start = time.time()
-            self.start_timer.clock_run = True
-            self.start_timer.tick()
+            self.start_timer.start_clock()
 
         self.control.verify_button.state(["!disabled"])
         self.control.abort_button.state(["!disabled"])
@@ -342,15 +381,13 @@ class DataWindow:
         # Not sure if there is something more proper to use
         if not self.timer.clock_run and self.control.mission_status == Status.VERIFIED:
             c = Comm.get_instance(self)
-            c.send("Ignition")
+            c.send("Ignition", self.command_result)
 
             # Kind of puts the whole thread to sleep for 5 secs
             # But I think this is what the issue is asking for
             # time.sleep(5)
 
-            self.timer.start = time.time()
-            self.timer.clock_run = True
-            self.timer.delay_tick()
+            self.timer.start_delay()
 
             self.control.mission_status = Status.LAUNCHED
             self.control.verify_button.config(text="VERIFY")
@@ -371,52 +408,27 @@ class DataWindow:
         if reset_window:
             self.log(Status.RESET)
             self.dataBalloon.reset_variables()
-            self.dataRocket.reset_variables()
+            if self.dataRocket is not None:
+                self.dataRocket.reset_variables()
 
     def log(self, status):
         """
-        Records the data in status.log
+        Records a mission event, with the current balloon data, in the flight log
         :param status: reason why the data was logged
         :return: None
         """
-        fo = open(self.status_log_path, "a")
-
-        current_date = datetime.datetime.fromtimestamp(time.time()).strftime('%Y-%m-%d %H:%M:%S')
-        if status == Status.ABORT:
-            fo.write("-------MISSION ABORTED-------\n")
-        elif status == Status.VERIFIED:
-            fo.write("-------STATUS VERIFIED-------\n")
-        elif status == Status.MANUAL:
-            fo.write("-----MANUAL LOG INVOKED------\n")
-        elif status == Status.RESET:
-            fo.write("-------VARIABLES RESET-------\n")
-        elif status == Status.RESTART:
-            fo.write("-------PROGRAM RESTART-------\n")
-        elif status == Status.NOT_VERIFIED:
-            fo.write("-----STATUS NOT VERIFIED-----\n")
-        elif status == Status.LAUNCHED:
-            fo.write("-------LAUNCHED-------\n")
-        elif status == Status.TIMEOUT:
-            fo.write("-------RADIO TIME OUT-------\n")
-
-        fo.write("DATE:" + current_date + "\n")
-        fo.write("MISSION START TIMESTAMP:" + repr(self.start_timer.current_time) + "\n")
-        fo.write("LAUNCH START TIMESTAMP:" + repr(self.timer.current_time) + "\n")
-        fo.write("*****************************\n")
-        fo.write("----------LOGS START---------\n")
-        fo.write("----------BALLOON DATA-------\n")
-        fo.write("Longitude = " + repr(self.dataBalloon.longitude_data) + "\n")
-        fo.write("Latitude = " + repr(self.dataBalloon.latitude_data) + "\n")
-        fo.write("Gyro(X) = " + repr(self.dataBalloon.gyroX_data) + "\n")
-        fo.write("Gyro(Y) = " + repr(self.dataBalloon.gyroY_data) + "\n")
-        fo.write("Gyro(Z) = " + repr(self.dataBalloon.gyroZ_data) + "\n")
-        fo.write("Temperature = " + repr(self.dataBalloon.temperature_data) + "\n")
-        fo.write("Acceleration(X) = " + repr(self.dataBalloon.accelX_data) + "\n")
-        fo.write("Acceleration(Y) = " + repr(self.dataBalloon.accelY_data) + "\n")
-        fo.write("Acceleration(Z) = " + repr(self.dataBalloon.accelZ_data) + "\n")
-        fo.write("----------LOGS END-----------\n")
-        fo.write("-----------------------------\n\n")
-        fo.close()
+        self.recorder.event(status,
+                            mission_time=self.start_timer.log_time(),
+                            launch_time=self.timer.log_time(),
+                            longitude=self.dataBalloon.longitude_data,
+                            latitude=self.dataBalloon.latitude_data,
+                            gyro_x=self.dataBalloon.gyroX_data,
+                            gyro_y=self.dataBalloon.gyroY_data,
+                            gyro_z=self.dataBalloon.gyroZ_data,
+                            temperature=self.dataBalloon.temperature_data,
+                            acc_x=self.dataBalloon.accelX_data,
+                            acc_y=self.dataBalloon.accelY_data,
+                            acc_z=self.dataBalloon.accelZ_data)
 
     def log_menu(self):
         """
@@ -425,12 +437,83 @@ class DataWindow:
         """
         log_window = Toplevel(self.name)
         log_window.title("Manual Log")
-        logged_label = Label(log_window, text="The current variables have been logged in 'logs/status.log'")
+        logged_label = Label(log_window, text="The current variables have been logged in 'logs/" +
+                                              os.path.basename(self.recorder.path) + "'")
         logged_label.pack()
         button = Button(log_window, text="Close", command=lambda: log_window.destroy())
         button.pack()
         self.log(Status.MANUAL)
 
+    def replay_menu(self):
+        """
+        Asks for a flight log or JSONL capture and replays it through the GUI, with a window to control the replay
+        :return: None
+        """
+        path = filedialog.askopenfilename(parent=self.name, title="Replay Flight", initialdir=LOG_FOLDER,
+                                          filetypes=[("Flight logs", "*.bin"), ("JSONL captures", "*.jsonl")])
+        if not path:
+            return
+
+        if self.replay is not None:
+            self.replay.stop()
+
+        try:
+            self.replay = ReplaySource(path, self.queue, 1, self.link_stats)
+        except Exception as e:
+            print("Replay Error")
+            print(e)
+            messagebox.showerror("ERROR: Cannot Replay", str(e))
+            return
+
+        self.link_stats.reset()
+        self.history.clear()
+        self.render_pending = None
+        self.graphs_changed()
+        self.replay.start()
+
+        replay = self.replay
+        replay_window = Toplevel(self.name)
+        replay_window.title("Replay " + os.path.basename(path))
+        replay_window.resizable(width=False, height=False)
+
+        position = Scale(replay_window, from_=0, to=max(replay.duration, 1), orient=HORIZONTAL, length=400,
+                         label="Flight time (s)", showvalue=True)
+        position.bind("<ButtonRelease-1>", lambda event: replay.seek(position.get()))
+        position.grid(row=0, column=0, columnspan=6)
+
+        pause_button = Button(replay_window, text="Pause")
+
+        def toggle_pause():
+            if replay.paused:
+                replay.resume()
+                pause_button.config(text="Pause")
+            else:
+                replay.pause()
+                pause_button.config(text="Resume")
+
+        pause_button.config(command=toggle_pause)
+        pause_button.grid(row=1, column=0)
+
+        for column, (text, speed) in enumerate([("1x", 1), ("10x", 10), ("100x", 100), ("Max", AS_FAST_AS_POSSIBLE)]):
+            Button(replay_window, text=text, command=lambda s=speed: replay.set_speed(s)).grid(row=1, column=column + 1)
+
+        def close():
+            replay.stop()
+            replay_window.destroy()
+
+        Button(replay_window, text="Stop", command=close).grid(row=1, column=5)
+        replay_window.protocol("WM_DELETE_WINDOW", close)
+
+        # Follows the replay while the slider is not being dragged
+        def follow():
+            if not replay_window.winfo_exists():
+                return
+            if replay.running:
+                position.set(replay.position)
+            replay_window.after(500, follow)
+
+        follow()
+
     def about_menu(self):
         """
         Pop up window with about information
@@ -476,6 +559,8 @@ class DataWindow:
         GPIO.output(self.gui_switch, GPIO.LOW)
         GPIO.cleanup()
         self.log(Status.RESTART)
+        # exec replaces the process without running the quit handler, so the log is flushed here
+        self.recorder.stop()
         os.execl(python, python, *sys.argv)
 
     def alter_test_mode(self):
@@ -489,6 +574,7 @@ class DataWindow:
         self.timer.reset()
         self.start_timer.reset()
         self.packets_sent.reset()
+        self.link_stats.reset()
         self.packets_received.reset()
         self.calc_received_percentage()
         c = Comm.get_instance(self)
@@ -614,17 +700,7 @@ class DataWindow:
 
                 try:
                     c = Comm.get_instance(self)
-                    if c.send("Stabilization off"):
-                        self.stability_button.config(text="Turn On Stabilization")
-                        self.stability = not self.stability
-                        self.packets_sent.set_count(c.get_packets_sent())
-                        self.packets_received.set_count(c.get_packets_received())
-                        self.calc_received_percentage()
-                    else:
-                        self.quality_checks[4].set_quality(0)
-                        messagebox.showerror("ERROR: Command Not Sent", "Command Not Sent")
-                        c.packets_sent -= 1
-
+                    c.send("Stabilization off", self.stability_result)
                 except Exception as e:
                     print("Stabilization Error")
                     print(e)
@@ -634,21 +710,46 @@ class DataWindow:
 
                 try:
                     c = Comm.get_instance(self)
-                    if c.send("Stabilization on"):
-                        self.stability_button.config(text="Turn Off Stabilization")
-                        self.stability = not self.stability
-                        self.packets_sent.set_count(c.get_packets_sent())
-                        self.packets_received.set_count(c.get_packets_received())
-                        self.calc_received_percentage()
-                    else:
-                        self.quality_checks[4].set_quality(0)
-                        messagebox.showerror("ERROR: Command Not Sent", "Command Not Sent")
-                        c.packets_sent -= 1
-
+                    c.send("Stabilization on", self.stability_result)
                 except Exception as e:
                     print("Stabilization Error")
                     print(e)
 
+    def stability_result(self, command, status):
+        """
+        Flips the stabilization button once the platform got the command
+        :param command: CommunicationDriver.Command that finished
+        :param status: CommandStatus
+        :return: None
+        """
+        if self.command_result(command, status):
+            self.stability = command.command == "Stabilization on"
+            if self.stability:
+                self.stability_button.config(text="Turn Off Stabilization")
+            else:
+                self.stability_button.config(text="Turn On Stabilization")
+
+    def command_result(self, command, status):
+        """
+        Called on the Tk thread when a queued command finished sending
+        :param command: CommunicationDriver.Command that finished
+        :param status: CommandStatus
+        :return: True if the command reached the platform
+        """
+        c = Comm.get_instance(self)
+        self.packets_sent.set_count(c.get_packets_sent())
+        self.calc_received_percentage()
+
+        if status in (CommandStatus.SENT, CommandStatus.ACKNOWLEDGED):
+            return True
+        if status == CommandStatus.DISCARDED:
+            return False
+
+        self.quality_checks[4].set_quality(0)
+        messagebox.showerror("ERROR: Command Not Sent",
+                             "Command \"" + command.command + "\" Not Sent (" + status.value + ")")
+        return False
+
     def abort_message_callback(self):
         """
         Callback if the user decides to abort the mission
@@ -664,10 +765,7 @@ class DataWindow:
             m = c.get_mode()
 
             c.testing()
-            c.send("launch")
-            self.packets_sent.set_count(c.get_packets_sent())
-            self.packets_received.set_count(c.get_packets_received())
-            self.calc_received_percentage()
+            c.send("launch", self.command_result)
             c.set_mode(m)
         except Exception as e:
             print("Test Launch Error")
@@ -679,10 +777,7 @@ class DataWindow:
             m = c.get_mode()
 
             c.testing()
-            c.send("abort")
-            self.packets_sent.set_count(c.get_packets_sent())
-            self.packets_received.set_count(c.get_packets_received())
-            self.calc_received_percentage()
+            c.send("abort", self.command_result)
             c.set_mode(m)
         except Exception as e:
             print("Test Abort Error")
@@ -694,10 +789,7 @@ class DataWindow:
             m = c.get_mode()
 
             c.testing()
-            c.send("stability")
-            self.packets_sent.set_count(c.get_packets_sent())
-            self.packets_received.set_count(c.get_packets_received())
-            self.calc_received_percentage()
+            c.send("stability", self.command_result)
             c.set_mode(m)
         except Exception as e:
             print("Test Stability Error")
@@ -707,10 +799,7 @@ class DataWindow:
         # TODO: Are we using CDM at all??? Get rid of?
         c = Comm.get_instance(self)
         c.flight()
-        c.send("cdm")
-        self.packets_sent.set_count(c.get_packets_sent())
-        self.packets_received.set_count(c.get_packets_received())
-        self.calc_received_percentage()
+        c.send("cdm", self.command_result)
 
         self.abort_method = "CDM"
         self.control.mission_status = Status.ABORT
@@ -731,10 +820,7 @@ class DataWindow:
         try:
             c = Comm.get_instance(self)
             c.flight()
-            c.send("qdm")
-            self.packets_sent.set_count(c.get_packets_sent())
-            self.packets_received.set_count(c.get_packets_received())
-            self.calc_received_percentage()
+            c.send("qdm", self.command_result)
         except Exception as e:
             print(e)
 
@@ -754,94 +840,85 @@ class DataWindow:
         self.control.change_status_display(self.control.mission_status)
         print("Mission Timeout")
 
-    def process_incoming(self):
+    def process_incoming(self, deadline=None):
         """
         Updates data
-        :return: None
+        :param deadline: time.perf_counter() value to stop at, the rest of the queue is left for the next call
+        :return: True if records were left in the queue
         """
-        # Process data in queue
+        # Process data in queue. Records arrive already parsed and validated by the TelemetryDecoder
+        received = False
+        more = False
+        displayed = None
+        shown = False
+
+        # Replayed records are stamped on the replay clock, which says nothing of the radio latency
+        live = self.replay is None or not self.replay.running or self.replay.finished
         while self.queue.qsize():
-            self.quality_checks[4].set_quality(1)
-            try:
-                if self.shutdown_timer is not None:
-                    self.shutdown_timer.stop()
-                self.shutdown_timer = ShutdownTimer(300, self.time_out)
-                data_json = self.queue.get()
-                print(data_json)
+            if deadline is not None and time.perf_counter() >= deadline:
+                more = True
+                break
 
-                origin = data_json["origin"]
-
-                if origin == "balloon":
-                    data = self.dataBalloon
-                elif origin == "status":
-                    self.quality_checks[0].set_quality(data_json["QDM"])
-                    self.quality_checks[1].set_quality(data_json["Ignition"])
-                    self.quality_checks[2].set_quality(data_json["Stabilization"])
-                    self.quality_checks[4].set_quality(data_json["PlatRadio"])
-
-                    return
-                else:
-                    print("JSON ORIGIN INCORRECT")
-                    return
-
-                gps_json = data_json["GPS"]
-                data.longitude_data = gps_json["long"]
-                data.latitude_data = gps_json["lat"]
-                data.altitude_data = gps_json["alt"]
-
-                gyro_json = data_json["gyro"]
-                data.gyroX_data = gyro_json["x"]
-                data.gyroY_data = gyro_json["y"]
-                data.gyroZ_data = gyro_json["z"]
-
-                data.temperature_data = data_json["temp"]
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
 
-                acc_json = data_json["acc"]
-                data.accelX_data = acc_json["x"]
-                data.accelY_data = acc_json["y"]
-                data.accelZ_data = acc_json["z"]
+            received = True
+            if live:
+                self.latency.since(LatencyTracker.RECEIVE_TO_DEQUEUED, record.received)
+            self.quality_checks[4].set_quality(1)
 
+            if record.origin == "status":
+                self.quality_checks[0].set_quality(record.qdm)
+                self.quality_checks[1].set_quality(record.ignition)
+                self.quality_checks[2].set_quality(record.stabilization)
+                self.quality_checks[4].set_quality(record.plat_radio)
+                continue
+
+            if record.origin == "balloon":
+                data = self.dataBalloon
+                data.longitude_data = record.longitude
+                data.latitude_data = record.latitude
+                data.altitude_data = record.altitude
+                data.gyroX_data = record.gyro_x
+                data.gyroY_data = record.gyro_y
+                data.gyroZ_data = record.gyro_z
+                data.temperature_data = record.temperature
+                data.accelX_data = record.acc_x
+                data.accelY_data = record.acc_y
+                data.accelZ_data = record.acc_z
                 data.display_variables()
+                shown = True
+                if live and displayed is None:
+                    displayed = record.received
+
+            # insert it into the graph history
+            self.history.append(record)
+
+            # Graphs are repainted by the render scheduler, not once per packet
+            self.graphs_changed(record.received if live else None)
+
+        # The labels show the newest values once per display frame rather than every packet or pass
+        if shown:
+            if displayed is not None and self.display_pending is None:
+                self.display_pending = displayed
+            self.display_scheduler.mark_dirty()
+
+        # Refresh the link counters once per batch rather than once per packet
+        if received:
+            # Restarting the radio time out starts a thread, so it is done at most once a second
+            now = time.monotonic()
+            if now - self.shutdown_timer_restarted >= 1.0:
+                if self.shutdown_timer is not None:
+                    self.shutdown_timer.stop()
+                self.shutdown_timer = ShutdownTimer(300, self.time_out)
+                self.shutdown_timer_restarted = now
 
-                # insert it into the queues
-                self.altitudeQ.get()
-                self.altitudeQ.put(data.altitude_data)
-
-                if self.altitude_graph is not None:
-                    self.altitude_graph.update_altitude(self.altitudeQ)
-
-                elif origin == "balloon":
-                    self.balloon_acc_xQ.get()
-                    self.balloon_acc_yQ.get()
-                    self.balloon_acc_zQ.get()
-                    self.balloon_gyro_xQ.get()
-                    self.balloon_gyro_yQ.get()
-                    self.balloon_gyro_zQ.get()
-                    self.balloon_acc_xQ.put(data.accelX_data)
-                    self.balloon_acc_yQ.put(data.accelY_data)
-                    self.balloon_acc_zQ.put(data.accelZ_data)
-                    self.balloon_gyro_xQ.put(data.gyroX_data)
-                    self.balloon_gyro_yQ.put(data.gyroY_data)
-                    self.balloon_gyro_zQ.put(data.gyroZ_data)
-                    if self.acc_gyro_graphs is not None:
-                        self.acc_gyro_graphs.update_balloon_acc(self.balloon_acc_xQ, self.balloon_acc_yQ,
-                                                                self.balloon_acc_zQ)
-                        self.acc_gyro_graphs.update_balloon_gyro(self.balloon_gyro_xQ, self.balloon_gyro_yQ,
-                                                                 self.balloon_gyro_zQ)
-
-                        # Set the data variables equal to the corresponding json entries
-                        # self.data.temperature_data = data_json["temperature"]
-                        # self.data.pressure_data = data_json["pressure"]
-                        # self.data.humidity_data = data_json["humidity"]
-                        # self.data.altitude_data = data_json["altitude"]
-                        # self.data.direction_data = data_json["direction"]
-                        # self.data.acceleration_data = data_json["acceleration"]
-                        # self.data.velocity_data = data_json["velocity"]
-                        # self.data.user_angle_data = data_json["user_angle"]
-                        # Reload variables
+            self.packets_received.refresh()
+            self.calc_received_percentage()
 
-            except queue.Empty:
-                pass
+        return more
 
     def close(self):
         """
@@ -849,24 +926,79 @@ class DataWindow:
         :return: None
         """
         self.running = 0
+        if self.replay is not None:
+            self.replay.stop()
 
-    def open_altitude_graph(self):
+    def open_graph(self, title):
         """
-        Opens and instance of the altitude graph
-        :return:None
+        Opens a graph tab, creating its panel from PANELS the first time
+        :param title: Key of the panel in PANELS
+        :return: None
         """
-        self.altitude_graph = AltitudeGraph()
-        self.altitude_graph.update_altitude(self.altitudeQ)
+        if title not in self.panels:
+            # matplotlib is only loaded with the first graph, it is the slowest import of the program
+            from PlotPanel import PlotPanel, PANELS
+            self.panels[title] = PlotPanel(self.graph_notebook.add_tab(title), self.history, PANELS[title],
+                                           GRAPH_POINTS, self.render_scheduler.mark_dirty)
+
+        self.graph_notebook.show(title)
+        self.render_scheduler.mark_dirty()
 
-    def open_acc_gyro_graphs(self):
+    def graphs_changed(self, received=None):
         """
-        Opens an instance of the acceleration and gyro graphs
+        Marks every open graph stale after the history changed and asks for a frame
+        :param received: Receive time of the record added to the history, None if the history changed otherwise
         :return: None
         """
-        self.acc_gyro_graphs = AccelerometerGyroGraphs()
+        for panel in self.panels.values():
+            panel.stale = True
+        # The oldest record waited the longest, so a sample is the worst case of its frame
+        if received is not None and self.render_pending is None:
+            self.render_pending = received
+        self.render_scheduler.mark_dirty()
+
+    def flush_display(self):
+        """
+        Updates the labels whose values changed. Called by the display scheduler once per frame
+        :return: None
+        """
+        start = time.perf_counter()
+        self.dataBalloon.flush()
+        self.latency.add(LatencyTracker.DISPLAY, time.perf_counter() - start)
 
-        self.acc_gyro_graphs.update_balloon_acc(self.balloon_acc_xQ, self.balloon_acc_yQ, self.balloon_acc_zQ)
-        self.acc_gyro_graphs.update_balloon_gyro(self.balloon_gyro_xQ, self.balloon_gyro_yQ, self.balloon_gyro_zQ)
+        if self.display_pending is not None:
+            self.latency.since(LatencyTracker.RECEIVE_TO_DISPLAYED, self.display_pending)
+            self.display_pending = None
+
+    def render_graphs(self):
+        """
+        Repaints every open graph that is stale and visible. Called by the render scheduler once per frame. Hidden
+        graphs stay stale and are repainted by the frame that follows the tab change showing them
+        :return: None
+        """
+        rendered = False
+        visible = False
+        start = time.perf_counter()
+
+        for panel in self.panels.values():
+            if not panel.is_visible():
+                continue
+            visible = True
+            if panel.stale:
+                panel.update()
+                panel.stale = False
+                rendered = True
+
+        if rendered:
+            self.latency.add(LatencyTracker.RENDER, time.perf_counter() - start)
+
+            # Once per frame that shows new records, so tab and view changes are not counted
+            if self.render_pending is not None:
+                self.latency.since(LatencyTracker.RECEIVE_TO_RENDERED, self.render_pending)
+
+        # With no graph on screen the records are not waiting for one, the time a tab stays hidden is not counted
+        if rendered or not visible:
+            self.render_pending = None
 
     def reset_radio(self):
         """
@@ -875,13 +1007,107 @@ class DataWindow:
         """
         self.radio.reset_radio()
 
+    def show_radio_state(self):
+        """
+        Shows the state of the local radio, which the RadioConnector keeps up in the background
+        :return: None
+        """
+        state = self.radio.connection_state
+        if state == ConnectionState.CONNECTED:
+            quality = ONLINE
+        elif state == ConnectionState.CONNECTING:
+            quality = CONNECTING
+        else:
+            quality = OFFLINE
+
+        if self.quality_checks[3].ready != quality:
+            self.quality_checks[3].set_quality(quality)
+
+    def show_link_load(self):
+        """
+        Shows the radio link utilisation, highlighted once it leaves no room for commands
+        :return: None
+        """
+        utilisation = self.radio.link_budget.utilisation()
+        text = str(round(utilisation * 100)) + " %"
+        if text == self.link_load.get():
+            return
+
+        self.link_load.set(text)
+        self.link_load_label.config(bg="#ff0000" if utilisation > TARGET_UTILISATION else self.frames_bg)
+
+    def link_budget_menu(self):
+        """
+        Pop up window with the radio link's traffic and the recommended telemetry rates
+        :return: None
+        """
+        budget = self.radio.link_budget.snapshot()
+        text = "Capacity: " + str(round(budget["capacity"])) + " B/s\n" \
+               "Downlink: " + str(round(budget["downlink"])) + " B/s\n" \
+               "Uplink: " + str(round(budget["uplink"])) + " B/s\n" \
+               "Utilisation: " + str(round(budget["utilisation"] * 100)) + " %\n\n" \
+               "Recommended telemetry rates:\n"
+        for origin, rate in sorted(budget["recommended_rates"].items()):
+            text += origin + ": " + str(round(rate, 2)) + " Hz\n"
+
+        messagebox.showinfo("Link Budget", text)
+
+    def diagnostics_window(self):
+        """
+        Window with the latency percentiles of every stage of the receive pipeline, refreshed every second
+        :return: None
+        """
+        diagnostics_window = Toplevel(self.name)
+        diagnostics_window.title("Diagnostics")
+        diagnostics_window.resizable(width=False, height=False)
+
+        for column, title in enumerate(["Stage", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Samples"]):
+            Label(diagnostics_window, text=title, font=('times', 12, 'underline')).grid(row=0, column=column)
+
+        cells = {}
+        for row, stage in enumerate(LatencyTracker.STAGES, 1):
+            Label(diagnostics_window, text=LatencyTracker.STAGE_NAMES[stage]).grid(row=row, column=0, sticky=W)
+            cells[stage] = []
+            for column in range(1, 5):
+                cell = StringVar()
+                Label(diagnostics_window, textvariable=cell, width=10).grid(row=row, column=column)
+                cells[stage].append(cell)
+
+        def refresh():
+            if not diagnostics_window.winfo_exists():
+                return
+
+            for stage in LatencyTracker.STAGES:
+                result = self.latency.percentiles(stage)
+                if result is None:
+                    values = ["-", "-", "-", "0"]
+                else:
+                    values = ["%.2f" % result["p50"], "%.2f" % result["p95"], "%.2f" % result["p99"],
+                              str(result["count"])]
+                for cell, value in zip(cells[stage], values):
+                    cell.set(value)
+
+            diagnostics_window.after(1000, refresh)
+
+        def dump():
+            path = self.latency.dump(os.path.dirname(self.recorder.path))
+            messagebox.showinfo("Diagnostics", "Latencies saved to " + path, parent=diagnostics_window)
+
+        row = len(LatencyTracker.STAGES) + 1
+        Button(diagnostics_window, text="Save", command=dump).grid(row=row, column=1)
+        Button(diagnostics_window, text="Reset", command=self.latency.reset).grid(row=row, column=2)
+        Button(diagnostics_window, text="Close", command=lambda: diagnostics_window.destroy()).grid(row=row, column=3)
+
+        refresh()
+
     def calc_received_percentage(self):
         """
-        Calculates the received rate of the packets using the counter numbers
+        Shows the percentage of recent telemetry packets that arrived, from the sequence numbers tracked by LinkStats
         :return: None
         """
-        if self.packets_sent.get_count() == 0:
+        percentage = self.link_stats.received_percentage()
+        if percentage is None:
             self.received_percentage.set("NaN")
             return
 
-        self.received_percentage.set(round(self.packets_received.get_count() * 100 / self.packets_sent.get_count(), 2))
+        self.received_percentage.set(round(percentage, 2))
@@ -0,0 +1,56 @@
+class DisplayBinding:
+    """
+    Batches telemetry label updates.
+
+    set() only stores the new value, it does not touch Tk. flush() formats every field that changed since the last
+    flush with its fixed precision and calls StringVar.set only if the formatted text differs from what is on screen,
+    so a label is redrawn at most once per flush and not at all while its value stays the same.
+    """
+
+    def __init__(self):
+        # name -> [StringVar, precision, pending value, shown text]
+        self._fields = {}
+        self._dirty = set()
+
+        # Number of StringVar.set calls made, for diagnostics
+        self.updates = 0
+
+    def add(self, name, var, precision):
+        """
+        Binds a field to a StringVar
+        :param name: Field name
+        :param var: StringVar shown by the label
+        :param precision: Digits after the decimal point
+        :return: None
+        """
+        self._fields[name] = [var, precision, None, None]
+
+    def set(self, name, value):
+        """
+        Stores a value to show on the next flush
+        :param name: Field name
+        :param value: Number to show
+        :return: None
+        """
+        field = self._fields[name]
+        if field[2] != value or field[3] is None:
+            field[2] = value
+            self._dirty.add(name)
+
+    def flush(self):
+        """
+        Pushes the changed fields to Tk
+        :return: Number of labels updated
+        """
+        updated = 0
+        for name in self._dirty:
+            var, precision, value, shown = self._fields[name]
+            text = "%.*f" % (precision, value)
+            if text != shown:
+                var.set(text)
+                self._fields[name][3] = text
+                updated += 1
+
+        self._dirty.clear()
+        self.updates += updated
+        return updated
@@ -0,0 +1,94 @@
+"""
+Decimation of telemetry series for plotting.
+
+A graph cannot show more points than it is wide in pixels, so drawing a long history point by point only costs time.
+Both methods reduce a series to about n points and return the sample index of every point they keep, so the x axis
+stays in samples of the original series:
+
+MIN_MAX   Keeps the minimum and maximum of n / 2 equal buckets, in time order. Fully vectorised and every peak
+          survives, the default for live graphs
+LTTB      Largest-Triangle-Three-Buckets: keeps the point of each bucket that forms the largest triangle with its
+          neighbours, which follows the shape of the curve more closely, at one numpy step per bucket
+"""
+import numpy as np
+
+MIN_MAX = "min_max"
+LTTB = "lttb"
+
+
+def downsample(y, n, method=MIN_MAX):
+    """
+    :param y: Sequence of samples, oldest first
+    :param n: Maximum number of points to return
+    :param method: MIN_MAX or LTTB
+    :return: (x, y) numpy arrays, x being the sample indices of the kept points
+    """
+    y = np.asarray(y)
+    if len(y) <= n or n < 3:
+        return np.arange(len(y)), y
+
+    if method == LTTB:
+        return lttb(y, n)
+    return min_max(y, n)
+
+
+def min_max(y, n):
+    """
+    Min/max bucket decimation
+    :param y: numpy array of samples
+    :param n: Maximum number of points to return, at least 2
+    :return: (x, y) numpy arrays
+    """
+    length = len(y)
+    size = -(-length // (n // 2))
+    buckets = -(-length // size)
+
+    # Pads the last bucket with its last sample, which never moves its first minimum or maximum
+    padded = np.pad(y, (0, buckets * size - length), mode="edge").reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    low = offsets + np.argmin(padded, axis=1)
+    high = offsets + np.argmax(padded, axis=1)
+
+    # Minimum and maximum of every bucket, whichever came first first
+    indices = np.empty(2 * buckets, dtype=np.intp)
+    indices[0::2] = np.minimum(low, high)
+    indices[1::2] = np.maximum(low, high)
+    return indices, y[indices]
+
+
+def lttb(y, n):
+    """
+    Largest-Triangle-Three-Buckets decimation, keeping the first and the last sample
+    :param y: numpy array of samples
+    :param n: Number of points to return, at least 3
+    :return: (x, y) numpy arrays
+    """
+    length = len(y)
+    x = np.arange(length, dtype=np.float64)
+
+    # Edges of the n - 2 buckets between the first and the last sample
+    edges = np.linspace(1, length - 1, n - 1).astype(np.intp)
+
+    indices = np.empty(n, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = length - 1
+
+    selected = 0
+    for bucket in range(n - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        # The third corner is the average of the next bucket, or the last sample
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+            average_x = x[next_start:next_end].mean()
+            average_y = y[next_start:next_end].mean()
+        else:
+            average_x, average_y = x[-1], y[-1]
+
+        # Twice the area of the triangle made by the selected point, each candidate and the average
+        areas = np.abs((x[selected] - average_x) * (y[start:end] - y[selected]) -
+                       (x[selected] - x[start:end]) * (average_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices, y[indices]
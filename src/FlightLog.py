@@ -0,0 +1,248 @@
+import json
+import os
+
+from FlightRecorder import MAGIC, INDEX_MAGIC, FILE_VERSION, INDEX_VERSION, FILE_HEADER, ENTRY, INDEX_POINT, \
+    INDEX_INTERVAL, KIND_PACKET, KIND_EVENT, KIND_REJECTED, ORIGINS, index_path
+from Telemetry import EventRecord, RejectedRecord
+from communications import PacketFormat
+from util.exception import FlightLogException, TelemetryDecodeException
+
+
+class FlightLog:
+    """
+    Reader for the flight logs written by FlightRecorder.
+
+    Keeps the sparse index in memory, loaded from the .idx file next to the log or rebuilt with one pass over the log.
+    Every index point holds the earliest and latest receive time of its block of entries, so a time range query only
+    reads the blocks that overlap the range. Entries are not strictly in receive order, an event can be written before
+    packets received earlier, so within those blocks every entry is checked against the range.
+    """
+
+    def __init__(self, path):
+        """
+        Init method
+        :param path: Path of the flight log
+        """
+        self.path = path
+        self.size = os.path.getsize(path)
+
+        # Parallel lists, one index point per block of INDEX_INTERVAL entries: the offset after the block, the
+        # earliest and latest receive time in it and the number of entries up to its end
+        self._ends = []
+        self._min_times = []
+        self._max_times = []
+        self._numbers = []
+
+        # Offset of the newest entry of each origin, None if the log has none
+        self._latest = {}
+
+        self.entries = 0
+        self.start_time = None
+        self.end_time = None
+        self.corrupt = 0
+
+        with open(path, "rb") as f:
+            header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header) != (MAGIC, FILE_VERSION):
+            raise FlightLogException(path + " is not a version " + str(FILE_VERSION) + " flight log")
+
+        if not self._load_index():
+            self._build_index()
+
+    def __len__(self):
+        return self.entries
+
+    def records(self, start=None, end=None, origins=None):
+        """
+        Lazily reads the records received in a time range, in the order they were written
+        :param start: Earliest receive time, defaults to the start of the log
+        :param end: Latest receive time, defaults to the end of the log
+        :param origins: Optional collection of origins to return, e.g. ("balloon", "event", "rejected")
+        :return: Generator of FlightRecord, StatusRecord, AckRecord, EventRecord and RejectedRecord
+        """
+        for offset, stop in self._ranges(start, end):
+            for entry_offset, kind, code, received, body in self._scan(offset, stop):
+                if start is not None and received < start:
+                    continue
+                if end is not None and received > end:
+                    continue
+                if origins is not None and self._origin(kind, code) not in origins:
+                    continue
+
+                record = self._decode(kind, received, body)
+                if record is not None:
+                    yield record
+
+    def latest(self, origin):
+        """
+        :param origin: "balloon", "rocket", "status", "ack", "event" or "rejected"
+        :return: The newest record of the origin, None if the log has none
+        """
+        if origin not in self._latest:
+            self._latest[origin] = self._find_latest(origin)
+
+        offset = self._latest[origin]
+        if offset is None:
+            return None
+
+        for entry_offset, kind, code, received, body in self._scan(offset):
+            return self._decode(kind, received, body)
+
+    def _ranges(self, start, end):
+        """
+        :param start: Earliest receive time, or None
+        :param end: Latest receive time, or None
+        :return: List of [offset, stop] file ranges holding every entry of the time range, stop None for the end of
+            the log
+        """
+        ranges = []
+        block_start = FILE_HEADER.size
+        for block_end, earliest, latest in zip(self._ends, self._min_times, self._max_times):
+            if (start is None or latest >= start) and (end is None or earliest <= end):
+                # Neighbouring blocks are read in one scan
+                if ranges and ranges[-1][1] == block_start:
+                    ranges[-1][1] = block_end
+                else:
+                    ranges.append([block_start, block_end])
+            block_start = block_end
+
+        # The entries after the last complete block have no index point
+        if ranges and ranges[-1][1] == block_start:
+            ranges[-1][1] = None
+        else:
+            ranges.append([block_start, None])
+        return ranges
+
+    def _load_index(self):
+        """
+        Reads the index written by the recorder, then scans the entries after its last point
+        :return: False if there is no usable index
+        """
+        try:
+            with open(index_path(self.path), "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+
+        if len(data) < FILE_HEADER.size or FILE_HEADER.unpack_from(data) != (INDEX_MAGIC, INDEX_VERSION):
+            return False
+
+        # A point may have been cut short by a crash
+        count = (len(data) - FILE_HEADER.size) // INDEX_POINT.size
+        for i in range(count):
+            end, earliest, latest, number = INDEX_POINT.unpack_from(data, FILE_HEADER.size + i * INDEX_POINT.size)
+            if end > self.size:
+                break
+            self._ends.append(end)
+            self._min_times.append(earliest)
+            self._max_times.append(latest)
+            self._numbers.append(number)
+
+        if not self._ends:
+            return False
+
+        self.start_time = min(self._min_times)
+        self.end_time = max(self._max_times)
+        self.entries = self._numbers[-1]
+        self._scan_tail(self._ends[-1])
+        return True
+
+    def _build_index(self):
+        self._scan_tail(FILE_HEADER.size, rebuild=True)
+
+    def _scan_tail(self, offset, rebuild=False):
+        """
+        Counts the entries from offset to the end of the log, noting the newest entry of each origin and the earliest
+        and latest receive time
+        :param offset: Offset of an entry
+        :param rebuild: Add index points on the way
+        :return: None
+        """
+        earliest = None
+        latest = None
+        for entry_offset, kind, code, received, body in self._scan(offset):
+            if self.start_time is None or received < self.start_time:
+                self.start_time = received
+            if self.end_time is None or received > self.end_time:
+                self.end_time = received
+            self.entries += 1
+            self._latest[self._origin(kind, code)] = entry_offset
+
+            if not rebuild:
+                continue
+
+            if earliest is None or received < earliest:
+                earliest = received
+            if latest is None or received > latest:
+                latest = received
+            if self.entries % INDEX_INTERVAL == 0:
+                self._ends.append(entry_offset + ENTRY.size + len(body))
+                self._min_times.append(earliest)
+                self._max_times.append(latest)
+                self._numbers.append(self.entries)
+                earliest = None
+                latest = None
+
+    def _find_latest(self, origin):
+        """
+        Walks the index blocks backwards until one holds an entry of the origin
+        :param origin: Origin to look for
+        :return: Offset of the newest entry of the origin, or None
+        """
+        for i in range(len(self._ends) - 1, -1, -1):
+            block_start = self._ends[i - 1] if i else FILE_HEADER.size
+            found = None
+            for entry_offset, kind, code, received, body in self._scan(block_start, self._ends[i]):
+                if self._origin(kind, code) == origin:
+                    found = entry_offset
+            if found is not None:
+                return found
+        return None
+
+    def _scan(self, offset, stop=None):
+        """
+        Reads raw entries. Every scan has its own file, so several generators can be used at once
+        :param offset: Offset of the first entry
+        :param stop: Offset to stop at, defaults to the end of the log
+        :return: Generator of (offset, kind, origin byte, receive time, body)
+        """
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while stop is None or offset < stop:
+                header = f.read(ENTRY.size)
+                if len(header) < ENTRY.size:
+                    return
+
+                length, kind, code, received = ENTRY.unpack(header)
+                body = f.read(length)
+                # The recorder was stopped in the middle of this entry
+                if len(body) < length:
+                    return
+
+                yield offset, kind, code, received, body
+                offset += ENTRY.size + length
+
+    def _origin(self, kind, code):
+        if kind == KIND_EVENT:
+            return "event"
+        if kind == KIND_REJECTED:
+            return "rejected"
+        if 0 < code <= len(ORIGINS):
+            return ORIGINS[code - 1]
+        return None
+
+    def _decode(self, kind, received, body):
+        try:
+            if kind == KIND_PACKET:
+                return PacketFormat.decode(body, received)
+            elif kind == KIND_REJECTED:
+                return RejectedRecord("rejected", None, received, body)
+            elif kind == KIND_EVENT:
+                fields = json.loads(body.decode("utf8"))
+                return EventRecord("event", None, received, fields.pop("status"), fields)
+        except (TelemetryDecodeException, ValueError, KeyError) as e:
+            print("Flight Log Entry Error")
+            print(e)
+
+        self.corrupt += 1
+        return None
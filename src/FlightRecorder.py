@@ -0,0 +1,260 @@
+"""
+Append-only binary flight log.
+
+A log starts with a file header, magic b"ORBLOG" and the log version (6sBx), followed by one entry per record:
+
+    entry header  body length (H), kind (B), origin (B), receive time (d), little endian
+    body          KIND_PACKET:   the frame exactly as it was received, in either PacketFormat encoding, so the log
+                                 keeps its sequence number, or the lack of one, and the full precision of its values
+                  KIND_REJECTED: a frame the decoder rejected, as it was received
+                  KIND_EVENT:    UTF-8 JSON object describing a mission event, e.g. {"status": "LAUNCHED", ...}
+
+The origin byte is 1 + the position of the packet's origin in ORIGINS, 0 for events and rejected frames, so a reader
+can pick the entries of an origin without decoding them.
+
+A crash can only cut the last entry short, every entry before it stays readable.
+
+Entries are in the order they were written, which is not quite receive order: an event is stamped when it happens,
+while packets received before it may still be waiting to be decoded.
+
+Next to the log the recorder writes a sparse index, <log>.idx: a file header with magic b"ORBIDX" and the index
+version, then one point per block of INDEX_INTERVAL entries, written once the block is complete, holding the file
+offset after the block (Q), the earliest and latest receive time in it (dd) and the number of entries up to its end
+(I). FlightLog uses it to skip the blocks outside a time range whatever the order of their entries, and rebuilds it
+if it is missing or of another version.
+"""
+import datetime
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+from communications import PacketFormat
+
+MAGIC = b"ORBLOG"
+FILE_VERSION = 2
+
+FILE_HEADER = struct.Struct("<6sBx")
+ENTRY = struct.Struct("<HBBd")
+
+INDEX_MAGIC = b"ORBIDX"
+INDEX_VERSION = 2
+INDEX_POINT = struct.Struct("<QddI")
+
+# Entries between two index points
+INDEX_INTERVAL = 256
+
+KIND_PACKET = 0
+KIND_EVENT = 1
+KIND_REJECTED = 2
+
+# Origins of packet entries, by origin byte - 1
+ORIGINS = ("balloon", "rocket", "status", "ack")
+
+# Entries buffered between the producers and the writer thread before new ones are dropped
+MAX_PENDING = 16384
+
+# Seconds between fsync calls while entries are being written
+FSYNC_INTERVAL = 1.0
+
+LOG_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../logs")
+
+
+def default_path():
+    """
+    :return: Path of a new log in the logs folder, named after the current time
+    """
+    name = datetime.datetime.now().strftime("flight-%Y%m%d-%H%M%S.bin")
+    return os.path.join(LOG_FOLDER, name)
+
+
+def index_path(path):
+    """
+    :param path: Path of a flight log
+    :return: Path of its index
+    """
+    return path + ".idx"
+
+
+class FlightRecorder:
+    """
+    Persists every received frame, decoded or rejected, and every mission event to a flight log.
+
+    record() and event() only put the entry on a bounded queue, so they are safe to call from the Tk and decoder
+    threads without ever waiting on the disk. A writer thread encodes the entries, appends them and fsyncs the file
+    every FSYNC_INTERVAL seconds. If the disk falls so far behind that the queue fills up, new entries are counted in
+    dropped rather than blocking the caller.
+    """
+
+    def __init__(self, path=None, max_pending=MAX_PENDING, fsync_interval=FSYNC_INTERVAL):
+        """
+        Init method
+        :param path: Log file to append to, defaults to a new file in the logs folder
+        :param max_pending: Maximum number of entries waiting for the writer thread
+        :param fsync_interval: Seconds between fsync calls
+        """
+        self.path = default_path() if path is None else path
+        self.fsync_interval = fsync_interval
+
+        self.written = 0
+        self.dropped = 0
+        self.bytes_written = 0
+
+        self._queue = queue.Queue(max_pending)
+        self._file = None
+        self._index = None
+        self._offset = 0
+        # Earliest and latest receive time of the block being written
+        self._block_start = None
+        self._block_end = None
+        self._dirty = False
+        self._last_sync = 0.0
+
+        self.thread = threading.Thread(target=self._run, name="FlightRecorder", daemon=True)
+
+    def start(self):
+        """
+        Opens the log and starts the writer thread
+        :return: None
+        """
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, FILE_VERSION))
+
+            self._index = open(index_path(self.path), "wb")
+            self._index.write(FILE_HEADER.pack(INDEX_MAGIC, INDEX_VERSION))
+        # When appending to an existing log the entry numbers are unknown, FlightLog rebuilds its index instead
+
+        self._offset = self._file.tell()
+
+        self._last_sync = time.monotonic()
+        self.thread.start()
+
+    def stop(self):
+        """
+        Writes the remaining entries, syncs and closes the log
+        :return: None
+        """
+        if not self.thread.is_alive():
+            return
+
+        # The sentinel may wait for room in a full queue, the writer is still draining it
+        self._queue.put(None)
+        self.thread.join()
+
+    def record(self, record, raw=None):
+        """
+        Queues a received record. Safe to call from any thread
+        :param record: FlightRecord, StatusRecord or AckRecord
+        :param raw: Frame the record was decoded from, stored as it is. Without one the record is encoded, in the
+            JSON encoding if it has no sequence number, which the binary one cannot leave out
+        :return: None
+        """
+        if raw is None:
+            raw = PacketFormat.encode(record, PacketFormat.JSON if record.seq is None else PacketFormat.BINARY)
+        origin = ORIGINS.index(record.origin) + 1 if record.origin in ORIGINS else 0
+        self._put((KIND_PACKET, origin, record.received, raw))
+
+    def reject(self, raw, received):
+        """
+        Queues a frame that could not be decoded. Safe to call from any thread
+        :param raw: The frame as it was received
+        :param received: Time the frame was received
+        :return: None
+        """
+        self._put((KIND_REJECTED, 0, received, raw))
+
+    def event(self, status, **fields):
+        """
+        Queues a mission event. Safe to call from any thread
+        :param status: Status the event is about
+        :param fields: Extra values stored with the event, must be JSON serializable
+        :return: None
+        """
+        fields["status"] = status.name
+        self._put((KIND_EVENT, 0, time.time(), fields))
+
+    def _put(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            try:
+                entry = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                self._sync()
+                continue
+
+            if entry is None:
+                break
+
+            try:
+                self._write(*entry)
+            except (OSError, ValueError, struct.error) as e:
+                self.dropped += 1
+                print("Flight Recorder Error")
+                print(e)
+
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+        self._sync()
+        self._file.close()
+        if self._index is not None:
+            self._index.close()
+
+    def _write(self, kind, origin, received, item):
+        if kind == KIND_EVENT:
+            body = json.dumps(item, separators=(",", ":")).encode("utf8")
+        elif isinstance(item, str):
+            body = item.encode("utf8")
+        else:
+            body = bytes(item)
+
+        # Entries with no receive time (e.g. generated locally) are stamped when written
+        if received is None:
+            received = time.time()
+
+        self._file.write(ENTRY.pack(len(body), kind, origin, received))
+        self._file.write(body)
+
+        self._dirty = True
+        self.written += 1
+        self.bytes_written += ENTRY.size + len(body)
+        self._offset += ENTRY.size + len(body)
+
+        if self._block_start is None or received < self._block_start:
+            self._block_start = received
+        if self._block_end is None or received > self._block_end:
+            self._block_end = received
+
+        if self.written % INDEX_INTERVAL == 0:
+            if self._index is not None:
+                self._index.write(INDEX_POINT.pack(self._offset, self._block_start, self._block_end, self.written))
+            self._block_start = None
+            self._block_end = None
+
+    def _sync(self):
+        self._last_sync = time.monotonic()
+        if not self._dirty:
+            return
+
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            # The index can always be rebuilt from the log, so it is only flushed
+            if self._index is not None:
+                self._index.flush()
+        except OSError as e:
+            print("Flight Recorder Sync Error")
+            print(e)
+        self._dirty = False
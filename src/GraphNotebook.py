@@ -0,0 +1,58 @@
+from tkinter import *
+from tkinter import ttk
+import tkinter as tk
+
+
+class GraphNotebook(ttk.Notebook):
+    """
+    Tab container that hosts the graphs inside the main window. The notebook is only placed in the grid once the
+    first graph is opened, so the main window keeps its layout until then.
+    """
+
+    def __init__(self, row, col, height, span, master=None):
+        """
+        Init method
+        :param row: Grid row of the notebook
+        :param col: Grid column of the notebook
+        :param height: Minimum height of the notebook
+        :param span: Number of grid rows the notebook spans
+        :param master: Window to place the notebook in
+        """
+        # Create Style
+        customed_style = ttk.Style()
+        customed_style.configure('Custom.TNotebook.Tab', width=20, padding=[0, 40], font=('Helvetica', 8))
+        customed_style.configure('Custom.TNotebook', tabposition='wn')
+
+        super().__init__(master, style='Custom.TNotebook')
+        self.config(height=height)
+
+        self.row = row
+        self.col = col
+        self.span = span
+        self.tabs_by_title = {}
+
+    def add_tab(self, title):
+        """
+        Adds an empty tab
+        :param title: Text shown on the tab
+        :return: Frame to build the tab's contents in
+        """
+        f = tk.Frame(self, width=200, height=200)
+        self.add(f, text=title)
+        self.tabs_by_title[title] = f
+        return f
+
+    def has_tab(self, title):
+        return title in self.tabs_by_title
+
+    def show(self, title):
+        """
+        Places the notebook in its window if needed and selects a tab
+        :param title: Text of the tab to select
+        :return: None
+        """
+        if not self.winfo_ismapped():
+            self.master.columnconfigure(self.col, weight=4)
+            self.grid(row=self.row, column=self.col, rowspan=self.span, sticky=N + S + E + W)
+
+        self.select(self.tabs_by_title[title])
@@ -0,0 +1,153 @@
+import os
+import queue
+import time
+from tkinter import READABLE, TclError
+
+# Seconds of Tk thread time one ingest pass may use before it yields to the event loop
+INGEST_BUDGET = 0.02
+
+# Seconds between safety polls, in case a wake up was missed
+IDLE_POLL = 0.5
+
+# Seconds between polls where Tk has no file handlers to wake it up, e.g. on Windows
+WAKE_POLL = 0.005
+
+
+class IngestQueue(queue.Queue):
+    """
+    Record queue that calls a listener after every put, so the consumer can be woken up instead of polling
+    """
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.listener = None
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        listener = self.listener
+        if listener is not None:
+            listener()
+
+
+class IngestScheduler:
+    """
+    Runs DataWindow.process_incoming on the Tk thread as soon as records arrive, a time budget at a time.
+
+    Producer threads call wake(), which writes a byte to a pipe whose read end is a Tk file handler, so the Tk event
+    loop wakes up at once while the producer never waits for the Tk thread, however long a pass or a render takes.
+    Only one wake up is in flight at a time, so a burst of records costs a single byte. Each pass processes records
+    until INGEST_BUDGET is used up and, if the queue is not empty yet, schedules the next pass after Tk has handled
+    pending events, so a burst never holds the Tk thread for longer than the budget. A slow poll catches wake ups
+    that were missed. Where Tk has no file handlers, the poll runs every WAKE_POLL instead.
+    """
+
+    def __init__(self, widget, process, budget=INGEST_BUDGET, idle_poll=IDLE_POLL):
+        """
+        Init method
+        :param widget: Tk widget the events and callbacks are scheduled on
+        :param process: Callable taking a time.perf_counter() deadline, returns True if records are left over
+        :param budget: Seconds per pass
+        :param idle_poll: Seconds between safety polls
+        """
+        self.widget = widget
+        self.process = process
+        self.budget = budget
+        self.idle_poll = idle_poll
+
+        self.passes = 0
+        self.carried_over = 0
+
+        self._wake_pending = False
+        self._pass_scheduled = False
+        self._closed = False
+
+        # (read end, write end) of the wake up pipe, None when polling instead
+        self._pipe = None
+        try:
+            read_fd, write_fd = os.pipe()
+        except OSError as e:
+            print("Ingest Wake Up Error")
+            print(e)
+        else:
+            os.set_blocking(read_fd, False)
+            os.set_blocking(write_fd, False)
+            try:
+                widget.tk.createfilehandler(read_fd, READABLE, self._on_wake)
+                self._pipe = (read_fd, write_fd)
+            except (AttributeError, TclError):
+                os.close(read_fd)
+                os.close(write_fd)
+
+        if self._pipe is None:
+            self.idle_poll = min(self.idle_poll, WAKE_POLL)
+
+        self._poll()
+
+    def wake(self):
+        """
+        Asks for a pass as soon as possible. Safe to call from any thread
+        :return: None
+        """
+        pipe = self._pipe
+        if self._wake_pending or self._closed or pipe is None:
+            return
+
+        self._wake_pending = True
+        try:
+            os.write(pipe[1], b"\0")
+        except BlockingIOError:
+            # The pipe is full of wake ups the Tk thread has not read yet
+            pass
+        except OSError:
+            # Closed, the poll picks the records up
+            self._wake_pending = False
+
+    def close(self):
+        """
+        Stops the passes and closes the pipe. Called on the Tk thread once the producers stopped calling wake()
+        :return: None
+        """
+        self._closed = True
+        if self._pipe is not None:
+            read_fd, write_fd = self._pipe
+            self._pipe = None
+            self.widget.tk.deletefilehandler(read_fd)
+            os.close(read_fd)
+            os.close(write_fd)
+
+    def _on_wake(self, fd, mask):
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self._wake_pending = False
+        self._run_pass()
+
+    def _poll(self):
+        if self._closed:
+            return
+        self._run_pass()
+        self.widget.after(int(self.idle_poll * 1000), self._poll)
+
+    def _continue(self):
+        self._pass_scheduled = False
+        self._run_pass()
+
+    def _run_pass(self):
+        if self._closed or self._pass_scheduled:
+            return
+
+        self.passes += 1
+        try:
+            more = self.process(time.perf_counter() + self.budget)
+        except Exception as e:
+            print("Process Incoming Error")
+            print(e)
+            more = False
+
+        if more:
+            # Let Tk redraw and handle input before the next pass
+            self.carried_over += 1
+            self._pass_scheduled = True
+            self.widget.after(1, self._continue)
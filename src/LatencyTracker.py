@@ -0,0 +1,124 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from TelemetryHistory import RingBuffer
+
+# Samples kept per stage, the percentiles are over the newest ones
+DEFAULT_WINDOW = 1000
+
+PERCENTILES = (50, 95, 99)
+
+# Stages, in pipeline order. The receive_to_* stages are measured from the time the radio callback stamped the
+# packet, the others are the duration of one step
+DECODE = "decode"
+RECEIVE_TO_QUEUED = "receive_to_queued"
+RECEIVE_TO_DEQUEUED = "receive_to_dequeued"
+DISPLAY = "display"
+RECEIVE_TO_DISPLAYED = "receive_to_displayed"
+RENDER = "render"
+RECEIVE_TO_RENDERED = "receive_to_rendered"
+
+STAGES = (DECODE, RECEIVE_TO_QUEUED, RECEIVE_TO_DEQUEUED, DISPLAY, RECEIVE_TO_DISPLAYED, RENDER,
+          RECEIVE_TO_RENDERED)
+
+STAGE_NAMES = {
+    DECODE: "Decode",
+    RECEIVE_TO_QUEUED: "Radio to queued",
+    RECEIVE_TO_DEQUEUED: "Radio to dequeued",
+    DISPLAY: "Label update",
+    RECEIVE_TO_DISPLAYED: "Radio to labels",
+    RENDER: "Graph render",
+    RECEIVE_TO_RENDERED: "Radio to graphs",
+}
+
+
+class LatencyTracker:
+    """
+    Rolling latency histograms of the receive pipeline, one RingBuffer of seconds per stage.
+
+    The decoder and the Tk thread add a sample per packet or per frame, which is a single float store, and the
+    percentiles are only computed when the diagnostics window or a dump asks for them. This shows whether display lag
+    comes from the radio and decoder, the wait in the record queue or the drawing.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """
+        Init method
+        :param window: Samples kept per stage
+        """
+        self.window = window
+        self.counts = {stage: 0 for stage in STAGES}
+        self._samples = {stage: RingBuffer(window) for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        """
+        Adds a sample. Safe to call from any thread
+        :param stage: One of STAGES
+        :param seconds: Duration or latency
+        :return: None
+        """
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self.counts[stage] += 1
+
+    def since(self, stage, start):
+        """
+        Adds the time since a time.time() timestamp, e.g. a record's receive time
+        :param stage: One of STAGES
+        :param start: Timestamp the stage started at
+        :return: None
+        """
+        if start is not None:
+            self.add(stage, time.time() - start)
+
+    def percentiles(self, stage):
+        """
+        :param stage: One of STAGES
+        :return: dict of milliseconds per percentile ("p50", "p95", "p99") and the sample count, or None without
+                 samples
+        """
+        with self._lock:
+            samples = np.array(self._samples[stage].view())
+            count = self.counts[stage]
+
+        if not len(samples):
+            return None
+
+        result = {"count": count}
+        for p, value in zip(PERCENTILES, np.percentile(samples * 1000.0, PERCENTILES)):
+            result["p" + str(p)] = float(value)
+        return result
+
+    def snapshot(self):
+        """
+        :return: dict of stage to percentiles, for every stage with samples
+        """
+        snapshot = {}
+        for stage in STAGES:
+            result = self.percentiles(stage)
+            if result is not None:
+                snapshot[stage] = result
+        return snapshot
+
+    def dump(self, folder):
+        """
+        Writes the current percentiles to a JSON file
+        :param folder: Folder the file is created in
+        :return: Path of the file
+        """
+        path = os.path.join(folder, datetime.datetime.now().strftime("latency-%Y%m%d-%H%M%S.json"))
+        with open(path, "w") as f:
+            json.dump({"time": time.time(), "window": self.window, "stages": self.snapshot()}, f, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            for stage in STAGES:
+                self._samples[stage].clear()
+                self.counts[stage] = 0
@@ -0,0 +1,236 @@
+import math
+import random
+import threading
+import time
+
+from Telemetry import FlightRecord, StatusRecord
+
+# Seconds between generator ticks, every packet due in a tick is sent at the start of it
+TICK = 0.01
+
+# Simulated flight
+BALLOON_ASCENT_RATE = 5.0
+BALLOON_BURST_ALTITUDE = 30000.0
+BALLOON_DESCENT_RATE = 15.0
+ROCKET_LAUNCH_ALTITUDE = BALLOON_BURST_ALTITUDE
+ROCKET_BURN_TIME = 5.0
+ROCKET_THRUST = 60.0
+GRAVITY = 9.81
+LAUNCH_LONGITUDE = -86.913
+LAUNCH_LATITUDE = 40.419
+
+# Standard deviation of the sensor noise
+ACC_NOISE = 0.05
+GYRO_NOISE = 0.5
+GPS_NOISE = 0.00002
+TEMPERATURE_NOISE = 0.1
+
+
+class LoadGenerator:
+    """
+    Synthetic telemetry source for stress testing the receive pipeline without a radio.
+
+    Balloon, rocket and status streams run at their own rates, from well below 1 Hz to several kHz. The balloon
+    climbs at BALLOON_ASCENT_RATE until it bursts, the rocket's altitude follows a powered ascent and a ballistic coast
+    and the IMU readings carry gaussian noise. Packets can be lost, duplicated or reordered on the way, and bursts
+    multiply every rate for a part of each burst period, like a link that delivers in clumps.
+
+    Packets are encoded with the given encoder and handed to submit, usually TelemetryDecoder.submit, so they take
+    the same path as packets from the radio.
+    """
+
+    def __init__(self, submit, encode, balloon_rate=1.0, rocket_rate=0.0, status_rate=1.0,
+                 loss=0.0, duplication=0.0, reordering=0.0,
+                 burst_period=0.0, burst_length=0.0, burst_factor=1.0, active=None, seed=None):
+        """
+        Init method
+        :param submit: Callable taking one encoded packet
+        :param encode: Callable turning a record into a packet, e.g. Module.encode
+        :param balloon_rate: Balloon packets per second, 0 disables the stream
+        :param rocket_rate: Rocket packets per second, 0 disables the stream
+        :param status_rate: Status packets per second, 0 disables the stream
+        :param loss: Probability a packet is dropped
+        :param duplication: Probability a packet is sent twice
+        :param reordering: Probability a packet is held back and sent after the next one of its origin
+        :param burst_period: Seconds between the starts of two bursts, 0 disables bursts
+        :param burst_length: Seconds a burst lasts
+        :param burst_factor: Multiplier of every rate during a burst
+        :param active: Optional callable, no packets are generated while it returns False
+        :param seed: Seed of the noise and impairments, for repeatable runs
+        """
+        self.submit = submit
+        self.encode = encode
+        self.rates = {"balloon": balloon_rate, "rocket": rocket_rate, "status": status_rate}
+
+        self.loss = loss
+        self.duplication = duplication
+        self.reordering = reordering
+
+        self.burst_period = burst_period
+        self.burst_length = burst_length
+        self.burst_factor = burst_factor
+
+        self.active = active
+        self.random = random.Random(seed)
+
+        # Generated packets per origin, also the next sequence number
+        self.generated = {origin: 0 for origin in self.rates}
+        self.sent = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.reordered = 0
+
+        # Seconds the generator fell behind its schedule on the last tick
+        self.lag = 0.0
+
+        self.running = False
+        self._owed = {origin: 0.0 for origin in self.rates}
+        # Packet held back per origin, sent after the next packet of the same origin so its sequence is out of order
+        self._held = {}
+        self._flight_time = 0.0
+
+        self.thread = threading.Thread(target=self._run, name="LoadGenerator", daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def set_rate(self, origin, rate):
+        """
+        :param origin: "balloon", "rocket" or "status"
+        :param rate: Packets per second, 0 disables the stream
+        :return: None
+        """
+        self.rates[origin] = rate
+
+    def _run(self):
+        last = time.monotonic()
+        next_tick = last
+
+        while self.running:
+            next_tick += TICK
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Skip the ticks that can no longer be made up
+                next_tick = time.monotonic()
+
+            now = time.monotonic()
+            elapsed = now - last
+            last = now
+            self.lag = max(0.0, -delay)
+
+            if self.active is not None and not self.active():
+                continue
+
+            self._flight_time += elapsed
+            self.tick(elapsed)
+
+    def tick(self, elapsed):
+        """
+        Generates the packets due in a time step
+        :param elapsed: Seconds since the last tick
+        :return: None
+        """
+        factor = self.burst_factor if self._in_burst() else 1.0
+
+        for origin, rate in self.rates.items():
+            if rate <= 0:
+                continue
+
+            self._owed[origin] += rate * factor * elapsed
+            while self._owed[origin] >= 1.0:
+                self._owed[origin] -= 1.0
+                self._send(self.record(origin))
+
+    def record(self, origin):
+        """
+        Creates the next record of a stream at the current flight time
+        :param origin: "balloon", "rocket" or "status"
+        :return: FlightRecord or StatusRecord
+        """
+        seq = self.generated[origin]
+        self.generated[origin] += 1
+
+        if origin == "status":
+            # Every check passed, as the test mode spoofer always reported
+            return StatusRecord("status", seq, None, 1, 1, 1, 1)
+
+        t = self._flight_time
+        gauss = self.random.gauss
+
+        if origin == "balloon":
+            altitude = self.balloon_altitude(t)
+            acc_z = GRAVITY
+        else:
+            altitude, acc_z = self.rocket_state(t)
+
+        # Standard atmosphere lapse rate, constant above the tropopause
+        temperature = 15.0 - 0.0065 * min(altitude, 11000.0)
+        # Slow wind drift and pendulum swing
+        drift = 0.0001 * t
+        swing = 10.0 * math.sin(t / 3.0)
+
+        return FlightRecord(origin, seq, None,
+                            altitude,
+                            LAUNCH_LONGITUDE + drift + gauss(0, GPS_NOISE),
+                            LAUNCH_LATITUDE + drift / 2 + gauss(0, GPS_NOISE),
+                            temperature + gauss(0, TEMPERATURE_NOISE),
+                            gauss(0, ACC_NOISE), gauss(0, ACC_NOISE), acc_z + gauss(0, ACC_NOISE),
+                            swing + gauss(0, GYRO_NOISE), gauss(0, GYRO_NOISE), gauss(0, GYRO_NOISE))
+
+    @staticmethod
+    def balloon_altitude(t):
+        burst_time = BALLOON_BURST_ALTITUDE / BALLOON_ASCENT_RATE
+        if t < burst_time:
+            return BALLOON_ASCENT_RATE * t
+        return max(0.0, BALLOON_BURST_ALTITUDE - BALLOON_DESCENT_RATE * (t - burst_time))
+
+    @staticmethod
+    def rocket_state(t):
+        """
+        :param t: Seconds since launch
+        :return: (altitude, vertical acceleration)
+        """
+        if t < ROCKET_BURN_TIME:
+            return ROCKET_LAUNCH_ALTITUDE + 0.5 * (ROCKET_THRUST - GRAVITY) * t * t, ROCKET_THRUST
+
+        burnout_velocity = (ROCKET_THRUST - GRAVITY) * ROCKET_BURN_TIME
+        burnout_altitude = 0.5 * (ROCKET_THRUST - GRAVITY) * ROCKET_BURN_TIME ** 2
+        coast = t - ROCKET_BURN_TIME
+        altitude = burnout_altitude + burnout_velocity * coast - 0.5 * GRAVITY * coast * coast
+        return ROCKET_LAUNCH_ALTITUDE + max(0.0, altitude), 0.0
+
+    def _in_burst(self):
+        if self.burst_period <= 0:
+            return False
+        return self._flight_time % self.burst_period < self.burst_length
+
+    def _send(self, record):
+        if self.random.random() < self.loss:
+            self.dropped += 1
+            return
+
+        packet = self.encode(record)
+
+        if record.origin not in self._held and self.random.random() < self.reordering:
+            self._held[record.origin] = packet
+            self.reordered += 1
+            return
+
+        self._submit(packet)
+        if self.random.random() < self.duplication:
+            self.duplicated += 1
+            self._submit(packet)
+
+        held = self._held.pop(record.origin, None)
+        if held is not None:
+            self._submit(held)
+
+    def _submit(self, packet):
+        self.sent += 1
+        self.submit(packet)
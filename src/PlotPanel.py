@@ -0,0 +1,171 @@
+#! /usr/bin/python3.6
+import collections
+
+from tkinter import *
+from tkinter import ttk
+import numpy as np
+from matplotlib import style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from BlitRenderer import BlitRenderer
+import Downsample
+
+# One line of a plot: a TelemetryHistory channel and the color it is drawn in
+Channel = collections.namedtuple("Channel", ["origin", "field", "color"])
+
+# One axes of a panel and the channels drawn on it
+Subplot = collections.namedtuple("Subplot", ["title", "ylabel", "channels"])
+
+# Colors of x, y and z lines, and of single lines
+X_COLOR = 'xkcd:yellow'
+Y_COLOR = 'xkcd:cyan'
+Z_COLOR = 'xkcd:fuchsia'
+
+# Graph tabs, by title. Adding a graph only takes an entry here
+PANELS = collections.OrderedDict([
+    ("Altitude", [Subplot("Altitude vs Time", "Altitude (m)",
+                          [Channel("balloon", "altitude", Y_COLOR)])]),
+    ("Direction", [Subplot("Balloon", "Acceleration (m/s^2)",
+                           [Channel("balloon", "acc_x", X_COLOR), Channel("balloon", "acc_y", Y_COLOR),
+                            Channel("balloon", "acc_z", Z_COLOR)]),
+                   Subplot(None, "Gyro (degrees/s)",
+                           [Channel("balloon", "gyro_x", X_COLOR), Channel("balloon", "gyro_y", Y_COLOR),
+                            Channel("balloon", "gyro_z", Z_COLOR)])]),
+    ("Rocket", [Subplot("Rocket", "Acceleration (m/s^2)",
+                        [Channel("rocket", "acc_x", X_COLOR), Channel("rocket", "acc_y", Y_COLOR),
+                         Channel("rocket", "acc_z", Z_COLOR)]),
+                Subplot(None, "Gyro (degrees/s)",
+                        [Channel("rocket", "gyro_x", X_COLOR), Channel("rocket", "gyro_y", Y_COLOR),
+                         Channel("rocket", "gyro_z", Z_COLOR)]),
+                Subplot(None, "Altitude (m)",
+                        [Channel("rocket", "altitude", Y_COLOR)])]),
+    ("Temperature", [Subplot("Temperature vs Time", "Temperature (C)",
+                             [Channel("balloon", "temperature", Y_COLOR),
+                              Channel("rocket", "temperature", Z_COLOR)])]),
+])
+
+# Time spans a panel can show, in seconds before the newest sample, None being the whole flight
+VIEWS = collections.OrderedDict([
+    ("30 s", 30),
+    ("5 min", 300),
+    ("1 h", 3600),
+    ("Flight", None),
+])
+
+DEFAULT_VIEW = "Flight"
+
+
+class PlotPanel:
+    """
+    Figure of stacked subplots whose lines are subscribed to TelemetryHistory channels.
+
+    The panel reads its channels straight from the shared history on every update, so any mix of origins and fields
+    is graphed without a copy or update method per channel, and all lines of the figure are repainted in one blit.
+    A row of buttons picks one of VIEWS, which the history serves from the tier that matches its span, and each line
+    is decimated to about the width of the panel in pixels, so the cost of a frame does not grow with the length of
+    the flight. Aggregated samples are drawn by their minimum and maximum, so peaks stay visible in every view.
+    """
+
+    def __init__(self, master, history, subplots, points, on_change=None, method=Downsample.MIN_MAX):
+        """
+        Init method
+        :param master: Tk widget that hosts the panel
+        :param history: TelemetryHistory the channels are read from
+        :param subplots: List of Subplot, top to bottom
+        :param points: Maximum number of points drawn per line
+        :param on_change: Called when another view is picked, so the panel gets redrawn
+        :param method: Downsample method
+        """
+        self.history = history
+        self.points = points
+        self.method = method
+        self.on_change = on_change
+        self.channels = []
+
+        # Set when the history or the view changed since the last update, cleared by the owner once it repainted
+        self.stale = True
+
+        # View buttons above the figure
+        self.view = StringVar(master, DEFAULT_VIEW)
+        controls = ttk.Frame(master)
+        controls.pack(side=TOP, fill=X)
+        for title in VIEWS:
+            ttk.Radiobutton(controls, text=title, value=title, variable=self.view,
+                            command=self.view_changed).pack(side=LEFT, padx=5)
+
+        # DARK THEME!!!!!
+        with style.context('dark_background'):
+            self.fig = Figure()
+
+            # Embedded in the Tk window, so it is drawn by the Tk mainloop rather than by pyplot
+            self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+            self.canvas.get_tk_widget().pack(fill=BOTH, expand=True)
+
+            # Lines are created once and redrawn in place, one renderer per figure so all axes share one blit
+            self.renderer = BlitRenderer(self.fig)
+            for index, subplot in enumerate(subplots):
+                axes = self.fig.add_subplot(len(subplots), 1, index + 1)
+                if subplot.title:
+                    axes.set_title(subplot.title)
+                axes.set_ylabel(subplot.ylabel)
+
+                for channel in subplot.channels:
+                    self.renderer.add_line(axes, channel.color)
+                    self.channels.append(channel)
+
+            axes.set_xlabel("Time (s)")
+
+        # Adjust the space so there is more space
+        self.fig.tight_layout()
+
+    def is_visible(self):
+        return self.renderer.is_visible()
+
+    def view_changed(self):
+        self.stale = True
+        if self.on_change is not None:
+            self.on_change()
+
+    def width(self):
+        """
+        :return: Number of points worth drawing per line, the panel's width in pixels up to the points limit
+        """
+        pixels = self.canvas.get_tk_widget().winfo_width()
+        # A widget that was not laid out yet reports 1
+        if pixels <= 1:
+            return self.points
+        return min(pixels, self.points)
+
+    def update(self):
+        """
+        Redraws every line from the history of its channel, over the picked view
+        :return: None
+        """
+        seconds = VIEWS[self.view.get()]
+        windows = [self.history.window(channel.origin, channel.field, seconds) for channel in self.channels]
+
+        # Whole flight views count from the first sample and grow, the others end at the newest sample
+        times = [window[0] for window in windows if len(window[0])]
+        if seconds is None:
+            x_range = None
+            reference = min(t[0] for t in times) if times else 0.0
+        else:
+            x_range = (-seconds, 0)
+            reference = max(t[-1] for t in times) if times else 0.0
+
+        points = self.width()
+        x_values = []
+        values = []
+        for times, low, mean, high in windows:
+            # Every entry as its minimum then its maximum, the same value twice for raw samples
+            x = np.repeat(times - reference, 2)
+            y = np.empty(len(x))
+            y[0::2] = low
+            y[1::2] = high
+
+            indices, y = Downsample.downsample(y, points, self.method)
+            x_values.append(x[indices])
+            values.append(y)
+
+        self.renderer.update(values, x_values, x_range)
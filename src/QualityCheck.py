@@ -1,5 +1,10 @@
 from tkinter import *
 
+# Values of ready
+OFFLINE = 0
+ONLINE = 1
+CONNECTING = 2
+
 
 class QualityCheck:
     def __init__(self, place_window, check_name, column_place, row_place, bg):
@@ -12,8 +17,10 @@ class QualityCheck:
         self.quality_indicator.grid(row=row_place + 1, column=column_place, sticky=N + E + W)
 
     def display_quality(self):
-        if self.ready == 1:
+        if self.ready == ONLINE:
             self.quality_indicator.config(text="Online", fg="green")
+        elif self.ready == CONNECTING:
+            self.quality_indicator.config(text="Connecting", fg="dark orange")
         else:
             self.quality_indicator.config(text="Offline", fg="red")
 
@@ -1,61 +1,50 @@
+import glob
 import os
-import json
-from pprint import pprint
-import subprocess
+import sys
 
+from FlightLog import FlightLog
+from FlightRecorder import LOG_FOLDER
+from TelemetryHistory import FIELDS
 
-class ReadLog:
 
-    def __init__(self):
+class ReadLog:
+    """
+    Prints the newest readings of a flight log
+    """
+
+    def __init__(self, path=None):
+        """
+        Init method
+        :param path: Flight log to read, defaults to the newest log in the logs folder
+        """
+        if path is None:
+            logs = sorted(glob.glob(os.path.join(LOG_FOLDER, "flight-*.bin")))
+            path = logs[-1] if logs else None
+
+        self.path = path
         self.status = 0
 
-    def getIndex(self, line):
-        i = 0
-        for c in line:
-            if c == '=':
-                i += 1
-                break
-            i += 1
-        return i + 1
-
-    def tail(self, f, n):
-        assert n >= 0
-        pos, lines = n + 1, []
-        while len(lines) <= n:
-            try:
-                f.seek(-pos, 2)
-
-            except IOError:
-                f.seek(0)
-                break
-            finally:
-                lines = list(f)
-            pos *= 2
-        return lines[-n:]
-
     def readLog(self):
-        with open("./logs/status.log", 'r') as f:
-            lines = self.tail(f, 11)
-        for line in lines:
-            if "temperature" in line:
-                i = self.getIndex(line)
-                print("temperature: " + line[i:-1])
-            elif "pressure" in line:
-                i = self.getIndex(line)
-                print("pressure: " + line[i:-1])
-            elif "humidity" in line:
-                i = self.getIndex(line)
-                print("humidity: " + line[i:-1])
-            elif "altitude" in line:
-                i = self.getIndex(line)
-                print("altitude: " + line[i:-1])
-            elif "direction" in line:
-                i = self.getIndex(line)
-                print("direction: " + line[i:-1])
-            elif "acceleration" in line:
-                i = self.getIndex(line)
-                print("acceleration: " + line[i:-1])
-            elif "velocity" in line:
-                i = self.getIndex(line)
-                print("velocity: " + line[i:-1])
+        if self.path is None:
+            print("No flight logs in " + LOG_FOLDER)
+            return
+
+        log = FlightLog(self.path)
+        print(self.path + ": " + str(len(log)) + " entries")
+
+        for origin in ("balloon", "rocket"):
+            record = log.latest(origin)
+            if record is None:
+                continue
+
+            print("----------" + origin.upper() + " DATA-------")
+            for field in FIELDS:
+                print(field + ": " + repr(getattr(record, field)))
+
+        event = log.latest("event")
+        if event is not None:
+            print("Last event: " + event.status)
+
 
+if __name__ == "__main__":
+    ReadLog(sys.argv[1] if len(sys.argv) > 1 else None).readLog()
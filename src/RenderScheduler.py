@@ -0,0 +1,68 @@
+import time
+
+# Default cap on graph repaints per second
+DEFAULT_MAX_FPS = 10
+
+
+class RenderScheduler:
+    """
+    Coalesces graph repaints into frames on the Tk event loop.
+
+    Incoming packets only mark the graphs dirty. At most one frame is scheduled at a time, and frames are spaced at
+    least 1 / max_fps apart, so every sample received between two frames is drawn by a single repaint and the cost of
+    plotting no longer grows with the packet rate.
+    """
+
+    def __init__(self, widget, render, max_fps=DEFAULT_MAX_FPS):
+        """
+        Init method
+        :param widget: Any Tk widget, used to schedule frames with after()
+        :param render: Callable that repaints the graphs. Graphs it skipped because they were hidden are repainted
+                       when whoever shows them calls mark_dirty()
+        :param max_fps: Maximum number of frames per second
+        """
+        self.widget = widget
+        self.render = render
+        self.frame_interval = 1.0 / max_fps
+
+        self.frames = 0
+        self._dirty = False
+        self._pending = None
+        self._last_frame = 0.0
+
+    def set_max_fps(self, max_fps):
+        self.frame_interval = 1.0 / max_fps
+
+    def mark_dirty(self):
+        """
+        Requests a repaint. Cheap enough to call once per packet
+        :return: None
+        """
+        self._dirty = True
+        if self._pending is None:
+            self._schedule()
+
+    def cancel(self):
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        self._dirty = False
+
+    def _schedule(self):
+        delay = self._last_frame + self.frame_interval - time.monotonic()
+        self._pending = self.widget.after(max(0, int(delay * 1000)), self._frame)
+
+    def _frame(self):
+        self._pending = None
+        if not self._dirty:
+            return
+
+        self._dirty = False
+        self._last_frame = time.monotonic()
+        self.frames += 1
+
+        try:
+            self.render()
+        except Exception as e:
+            print("Render Error")
+            print(e)
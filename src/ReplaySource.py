@@ -0,0 +1,250 @@
+import bisect
+import json
+import threading
+import time
+
+from FlightLog import FlightLog
+from communications import PacketFormat
+from util.exception import TelemetryDecodeException
+
+# Speed for replaying without waiting between packets
+AS_FAST_AS_POSSIBLE = 0
+
+# Seconds between packets of a JSONL capture that has no "received" times
+CAPTURE_INTERVAL = 1.0
+
+# In AS_FAST_AS_POSSIBLE mode, records allowed to wait in the record queue before the replay waits for the GUI
+MAX_BACKLOG = 5000
+
+# Only telemetry is replayed, the logged acks and events are skipped
+ORIGINS = ("balloon", "rocket", "status")
+
+
+def load_capture(path):
+    """
+    Reads a JSONL capture, one packet in the res/json_format layout per line. A line may carry its receive time in
+    a "received" key, lines without one are spaced CAPTURE_INTERVAL seconds apart
+    :param path: Path of the capture
+    :return: List of records, oldest first
+    """
+    records = []
+    with open(path, "r") as f:
+        for number, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                data = json.loads(line)
+                received = float(data.pop("received", number * CAPTURE_INTERVAL))
+                records.append(PacketFormat.decode_json(data, received))
+            except (ValueError, AttributeError, TelemetryDecodeException) as e:
+                print("Capture Error on line " + str(number + 1))
+                print(e)
+
+    records.sort(key=lambda record: record.received)
+    return records
+
+
+class ReplaySource:
+    """
+    Feeds a recorded flight back into the record queue DataWindow.process_incoming drains, as if it was being received.
+
+    Packets keep their original spacing, scaled by the replay speed: 1 is real time, 10 and 100 are accelerated and
+    AS_FAST_AS_POSSIBLE does not wait at all. The replay can be paused, sped up or moved to another point of the
+    flight while it runs, a seek after the end of the flight replays it again from there. Records are stamped on a
+    replay clock that starts at the wall time the replay started and then follows the flight time, so the graphs show
+    the flight's own spacing and gaps at any speed, and a seek continues the clock rather than moving it back. The
+    order and contents of the replayed stream only depend on the log.
+    """
+
+    def __init__(self, path, record_queue, speed=1, link_stats=None):
+        """
+        Init method
+        :param path: Flight log (.bin) or JSONL capture (.jsonl) to replay
+        :param record_queue: Queue the records are put on
+        :param speed: Replay speed, a multiple of real time or AS_FAST_AS_POSSIBLE
+        :param link_stats: Optional LinkStats every replayed record is accounted in
+        """
+        self.path = path
+        self.record_queue = record_queue
+        self.link_stats = link_stats
+
+        if path.endswith(".jsonl"):
+            self.log = None
+            self.capture = load_capture(path)
+            self.start_time = self.capture[0].received if self.capture else 0.0
+            self.end_time = self.capture[-1].received if self.capture else 0.0
+        else:
+            self.log = FlightLog(path)
+            self.capture = None
+            self.start_time = self.log.start_time or 0.0
+            self.end_time = self.log.end_time or 0.0
+
+        self.replayed = 0
+        self.running = False
+        self.finished = False
+
+        # Flight time, in seconds since start_time, of the last replayed record
+        self.position = 0.0
+
+        self._speed = speed
+        self._paused = False
+        self._seek_to = None
+        self._changed = False
+        self._condition = threading.Condition()
+
+        # Replay clock time of the last replayed record, kept when the replay is restarted by a seek
+        self._clock = None
+
+        self.thread = None
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    @property
+    def speed(self):
+        return self._speed
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def start(self):
+        self.running = True
+        self.finished = False
+        self.thread = threading.Thread(target=self._run, name="ReplaySource", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+
+    def pause(self):
+        with self._condition:
+            self._paused = True
+            self._condition.notify()
+
+    def resume(self):
+        with self._condition:
+            self._paused = False
+            self._changed = True
+            self._condition.notify()
+
+    def set_speed(self, speed):
+        """
+        :param speed: Multiple of real time or AS_FAST_AS_POSSIBLE
+        :return: None
+        """
+        with self._condition:
+            self._speed = speed
+            self._changed = True
+            self._condition.notify()
+
+    def seek(self, position):
+        """
+        Continues the replay from a point of the flight
+        :param position: Seconds since the start of the flight
+        :return: None
+        """
+        with self._condition:
+            self._seek_to = min(max(position, 0.0), self.duration)
+            self._changed = True
+            self._condition.notify()
+            restart = self.finished
+
+        # The thread ended with the flight, a new one continues from the seek
+        if restart:
+            self.thread.join()
+            self.start()
+
+    def _records(self, position):
+        """
+        :param position: Seconds since the start of the flight
+        :return: Iterator over the records from that point on
+        """
+        start = self.start_time + position
+        if self.log is not None:
+            return self.log.records(start=start, origins=ORIGINS)
+
+        times = [record.received for record in self.capture]
+        return iter(self.capture[bisect.bisect_left(times, start):])
+
+    def _run(self):
+        records = self._records(0.0)
+        # Wall clock time at which the flight was at anchor_position
+        anchor_wall = time.monotonic()
+        anchor_position = 0.0
+
+        # Replay clock time of anchor_position, and of the last replayed record
+        clock = time.time() if self._clock is None else self._clock
+        anchor_clock = clock
+
+        while self.running:
+            with self._condition:
+                while self._paused and self.running:
+                    self._condition.wait()
+
+                if self._seek_to is not None:
+                    self.position = self._seek_to
+                    records = self._records(self._seek_to)
+                    self._seek_to = None
+
+                if self._changed:
+                    anchor_wall = time.monotonic()
+                    anchor_position = self.position
+                    anchor_clock = clock
+                    self._changed = False
+
+            record = next(records, None)
+            if record is None:
+                self.finished = True
+                break
+
+            position = record.received - self.start_time
+            if not self._wait(anchor_wall, anchor_position, position):
+                # Paused, seeked or sped up while waiting, the record is sent after re-anchoring unless seeked
+                if self._seek_to is None:
+                    records = self._prepend(record, records)
+                continue
+
+            self.position = position
+            self.replayed += 1
+
+            clock = anchor_clock + (position - anchor_position)
+            self._clock = clock
+            record = record._replace(received=clock)
+            if self.link_stats is not None:
+                self.link_stats.observe(record)
+            self.record_queue.put(record)
+
+        self.running = False
+
+    def _wait(self, anchor_wall, anchor_position, position):
+        """
+        Waits until a record is due
+        :return: False if the replay was changed while waiting
+        """
+        with self._condition:
+            if self._speed == AS_FAST_AS_POSSIBLE:
+                # Let the GUI catch up rather than filling memory
+                while self.record_queue.qsize() > MAX_BACKLOG and self.running and not self._changed:
+                    self._condition.wait(0.01)
+                return self.running and not self._changed and not self._paused
+
+            due = anchor_wall + (position - anchor_position) / self._speed
+            while self.running and not self._changed and not self._paused:
+                remaining = due - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self._condition.wait(remaining)
+
+            return False
+
+    @staticmethod
+    def _prepend(record, records):
+        yield record
+        for rest in records:
+            yield rest
@@ -0,0 +1,207 @@
+import contextlib
+import datetime
+import importlib
+import io
+import os
+import sys
+import threading
+import time
+
+# Modules only the graphs use, imported in the background once the window is up. The Tk backend itself is left to
+# the first graph, so no Tk code runs off the Tk thread
+PREWARM_MODULES = ("numpy", "matplotlib", "matplotlib.style", "matplotlib.figure", "matplotlib.backends.backend_agg",
+                   "BlitRenderer", "Downsample")
+
+# Command line flag of ThreadedWindow that turns on the profiler and the report file. Read from sys.argv when this
+# module is imported, so the profiler already sees the other imports
+PROFILE_FLAG = "--profile-startup"
+
+# Functions listed in the report, by cumulative time
+PROFILE_LINES = 40
+
+
+class StartupReport:
+    """
+    Times the start of the ground station, from the first line of ThreadedWindow to the first frame on screen, and
+    how long the background prewarm of the graph modules takes.
+
+    The code that starts the program wraps its steps in phase(), e.g. the radio open or the GPIO setup, so a slow
+    start can be traced to one of them. With a report folder set, the phases and, if the profiler ran, the slowest
+    functions up to the first frame are written to a report file once the start up is over.
+    """
+
+    def __init__(self, started=None):
+        """
+        Init method
+        :param started: time.perf_counter() the program started at, defaults to now
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.first_frame = None
+        self.prewarm = None
+        self.prewarm_failed = []
+
+        # (name, start, duration) in seconds since started, in the order the phases ended
+        self.phases = []
+
+        # Folder the report is written to, None to not write one
+        self.folder = None
+        self.path = None
+        self.profiler = None
+
+        # Steps the report is written after: the first frame, and the prewarm and the first radio connect attempt
+        # when they run
+        self._waiting = 1
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def start_profiler(self):
+        """
+        Profiles the Tk thread until the first frame
+        :return: None
+        """
+        import cProfile
+
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times the block it wraps
+        :param name: Name of the phase in the report
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start)
+
+    def add_phase(self, name, start, end=None):
+        """
+        :param name: Name of the phase in the report
+        :param start: time.perf_counter() the phase started at
+        :param end: time.perf_counter() the phase ended at, defaults to now
+        :return: None
+        """
+        end = time.perf_counter() if end is None else end
+        self.phases.append((name, start - self.started, end - start))
+
+    def wait_first_frame(self, root, callback=None):
+        """
+        Records the first frame once the Tk main loop has drawn the window
+        :param root: Tk root window
+        :param callback: Called on the Tk thread after the first frame, e.g. to start the prewarm
+        :return: None
+        """
+        waited = time.perf_counter()
+
+        def shown():
+            # The idle callbacks, which include the window's geometry and redraw, ran before this one
+            root.update_idletasks()
+            self.first_frame = self.elapsed()
+            self.add_phase("first frame", waited)
+            if self.profiler is not None:
+                self.profiler.disable()
+            print("Window shown after %.2f s" % self.first_frame)
+
+            if callback is not None:
+                callback()
+            self.release()
+
+        root.after(0, shown)
+
+    def start_prewarm(self, modules=PREWARM_MODULES):
+        """
+        Imports modules on a daemon thread, so the first graph does not wait for matplotlib
+        :param modules: Names of the modules to import
+        :return: The thread
+        """
+        self.hold()
+        thread = threading.Thread(target=self._prewarm, args=(modules,), name="Prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def summary(self):
+        """
+        :return: Text of the report
+        """
+        lines = ["Ground station start up, " + datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), ""]
+        if self.first_frame is not None:
+            lines.append("First frame after %.3f s" % self.first_frame)
+        if self.prewarm is not None:
+            lines.append("Graph modules preloaded in %.3f s" % self.prewarm)
+        if self.prewarm_failed:
+            lines.append("Graph modules that failed to load: " + ", ".join(self.prewarm_failed))
+
+        lines += ["", "%-24s %10s %10s" % ("Phase", "Start (s)", "Time (s)")]
+        for name, start, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append("%-24s %10.3f %10.3f" % (name, start, duration))
+
+        if self.profiler is not None:
+            import pstats
+
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            lines += ["", "Slowest calls up to the first frame, by cumulative time", stream.getvalue()]
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, folder):
+        """
+        Writes the report to a new file
+        :param folder: Folder the file is created in
+        :return: Path of the file
+        """
+        path = os.path.join(folder, datetime.datetime.now().strftime("startup-%Y%m%d-%H%M%S.txt"))
+        with open(path, "w") as f:
+            f.write(self.summary())
+        return path
+
+    def _prewarm(self, modules):
+        start = time.perf_counter()
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print("Prewarm Error")
+                print(e)
+                self.prewarm_failed.append(name)
+
+        self.prewarm = time.perf_counter() - start
+        self.add_phase("prewarm", start)
+        print("Graph modules preloaded in %.2f s" % self.prewarm)
+        self.release()
+
+    def hold(self):
+        """
+        Makes the report wait for a step that runs on another thread, until release() is called for it
+        :return: None
+        """
+        with self._lock:
+            self._waiting += 1
+
+    def release(self):
+        """
+        Marks a step the report waits for as done, and writes the report after the last one. Safe to call from any
+        thread
+        :return: None
+        """
+        with self._lock:
+            self._waiting -= 1
+            if self._waiting or self.folder is None:
+                return
+
+        try:
+            self.path = self.write(self.folder)
+            print("Start up report saved to " + self.path)
+        except OSError as e:
+            print("Start Up Report Error")
+            print(e)
+
+
+# The start up of this process, timed from the first import of this module
+report = StartupReport()
+if PROFILE_FLAG in sys.argv:
+    report.start_profiler()
@@ -4,6 +4,7 @@ from tkinter import *
 class StatCounter:
     def __init__(self, place_window, check_name, column_place, row_place, bg):
         self.counter = 0
+        self.source = None
         self.counterStrVar = StringVar()
         self.counterStrVar.set(self.counter)
 
@@ -21,6 +22,20 @@ class StatCounter:
         self.counter = count
         self.counterStrVar.set(self.counter)
 
+    def bind(self, source):
+        """
+        Binds the counter to a stats source, refresh() then pulls the count from it
+        :param source: Callable returning the current count, e.g. LinkStats.received
+        :return: None
+        """
+        self.source = source
+
+    def refresh(self):
+        if self.source is not None:
+            count = self.source()
+            if count != self.counter:
+                self.set_count(count)
+
     def get_count(self):
         return self.counter
 
@@ -0,0 +1,33 @@
+from collections import namedtuple
+
+# Decoded balloon or rocket packet. Field names match TelemetryHistory.FIELDS
+FlightRecord = namedtuple("FlightRecord", [
+    "origin", "seq", "received",
+    "altitude", "longitude", "latitude", "temperature",
+    "acc_x", "acc_y", "acc_z",
+    "gyro_x", "gyro_y", "gyro_z",
+])
+
+# Decoded launch platform status packet, every check is 0 or 1
+StatusRecord = namedtuple("StatusRecord", [
+    "origin", "seq", "received",
+    "qdm", "ignition", "stabilization", "plat_radio",
+])
+
+# Acknowledgement of a ground station command, command_id is the id the command was sent with
+AckRecord = namedtuple("AckRecord", [
+    "origin", "seq", "received",
+    "command_id",
+])
+
+# Mission event read back from a flight log, status is the Status name and fields the values stored with it
+EventRecord = namedtuple("EventRecord", [
+    "origin", "seq", "received",
+    "status", "fields",
+])
+
+# Frame the decoder rejected, read back from a flight log as it was received
+RejectedRecord = namedtuple("RejectedRecord", [
+    "origin", "seq", "received",
+    "raw",
+])
@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+
+import LatencyTracker
+from communications import PacketFormat
+from util.exception import TelemetryDecodeException
+
+
+class TelemetryDecoder:
+    """
+    Decode stage between the radio and the GUI.
+
+    The radio callback only puts (raw frame, receive time) pairs on the raw queue, so the XBee reader thread never
+    waits on parsing. This thread decodes them with PacketFormat, in either encoding, and puts ready-to-display
+    records on the record queue that DataWindow.process_incoming drains. Command acknowledgements are not telemetry,
+    they are handed to on_ack instead.
+    """
+
+    def __init__(self, raw_queue, record_queue, link_stats=None, on_ack=None, recorder=None, link_budget=None,
+                 latency=None):
+        """
+        Init method
+        :param raw_queue: Queue of (raw frame, receive time) pairs filled by the radio
+        :param record_queue: Queue the decoded records are put on
+        :param link_stats: Optional LinkStats that every decoded record is accounted in
+        :param on_ack: Optional callable, called on this thread with the command id of every acknowledgement
+        :param recorder: Optional FlightRecorder every frame is logged to, as it was received
+        :param link_budget: Optional LinkBudget the size of every frame is counted in
+        :param latency: Optional LatencyTracker the decode time and queueing latency are added to
+        """
+        self.raw_queue = raw_queue
+        self.record_queue = record_queue
+        self.link_stats = link_stats
+        self.on_ack = on_ack
+        self.recorder = recorder
+        self.link_budget = link_budget
+        self.latency = latency
+
+        self.decoded = 0
+        self.rejected = 0
+
+        self.thread = threading.Thread(target=self._run, name="TelemetryDecoder", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        # None wakes the thread up and tells it to exit
+        self.raw_queue.put(None)
+
+    def submit(self, raw, received=None):
+        """
+        Queues a raw frame for decoding. Safe to call from any thread
+        :param raw: bytes or str holding one packet
+        :param received: Time the packet was received, defaults to now
+        :return: None
+        """
+        self.raw_queue.put((raw, time.time() if received is None else received))
+
+    def _run(self):
+        while True:
+            item = self.raw_queue.get()
+            if item is None:
+                return
+
+            raw, received = item
+            start = time.perf_counter()
+            try:
+                record = PacketFormat.decode(raw, received)
+            except TelemetryDecodeException as e:
+                if self.link_budget is not None:
+                    self.link_budget.count_received(len(raw), None, received)
+                self.rejected += 1
+                if self.recorder is not None:
+                    self.recorder.reject(raw, received)
+                print("Telemetry Decode Error")
+                print(e)
+                continue
+
+            self.decoded += 1
+            if self.latency is not None:
+                self.latency.add(LatencyTracker.DECODE, time.perf_counter() - start)
+            if self.link_budget is not None:
+                self.link_budget.count_received(len(raw), record.origin, received)
+            if self.recorder is not None:
+                self.recorder.record(record, raw)
+
+            if record.origin == "ack":
+                if self.on_ack is not None:
+                    self.on_ack(record.command_id)
+                continue
+
+            if self.link_stats is not None:
+                self.link_stats.observe(record)
+            self.record_queue.put(record)
+            if self.latency is not None:
+                self.latency.since(LatencyTracker.RECEIVE_TO_QUEUED, received)
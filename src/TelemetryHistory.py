@@ -0,0 +1,277 @@
+import numpy as np
+
+# Number of samples kept per channel and tier when no capacity is given
+DEFAULT_CAPACITY = 1000
+
+# Number of aggregated tiers kept above the raw samples when none is given
+DEFAULT_LEVELS = 3
+
+# Samples of a tier combined into one sample of the next, coarser tier
+TIER_FACTOR = 10
+
+# Buckets aggregated at once, so the cost of an aggregation is shared by TIER_FACTOR * TIER_BATCH samples
+TIER_BATCH = 10
+
+ORIGINS = ("balloon", "rocket")
+
+FIELDS = ("altitude", "longitude", "latitude", "temperature",
+          "acc_x", "acc_y", "acc_z",
+          "gyro_x", "gyro_y", "gyro_z")
+
+
+class RingBuffer:
+    """
+    Fixed-capacity float64 ring buffer.
+
+    Every sample is written twice, once at its slot and once at its slot plus the capacity, so the newest samples are
+    always one contiguous slice of the backing array. This keeps append O(1) and lets view() hand out ordered,
+    read-only numpy views without copying.
+    """
+
+    def __init__(self, capacity):
+        """
+        Init method
+        :param capacity: Maximum number of samples kept
+        """
+        if capacity < 1:
+            raise ValueError("RingBuffer capacity must be at least 1")
+
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        """
+        Adds a sample, overwriting the oldest one once the buffer is full
+        :param value: Sample to store
+        :return: None
+        """
+        head = self._head
+        self._data[head] = value
+        self._data[head + self.capacity] = value
+
+        head += 1
+        self._head = 0 if head == self.capacity else head
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, values):
+        """
+        Adds several samples in one vectorised write
+        :param values: Sequence of samples, oldest first
+        :return: None
+        """
+        values = np.asarray(values, dtype=np.float64)[-self.capacity:]
+        n = len(values)
+        head = self._head
+        capacity = self.capacity
+
+        first = min(n, capacity - head)
+        self._data[head:head + first] = values[:first]
+        self._data[head + capacity:head + capacity + first] = values[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = values[first:]
+            self._data[capacity:capacity + rest] = values[first:]
+
+        self._head = (head + n) % capacity
+        self._count = min(self._count + n, capacity)
+
+    def view(self, n=None):
+        """
+        Returns the newest samples, oldest first, as a read-only view into the buffer.
+        The view is only valid until the next append.
+        :param n: Number of samples to return, defaults to all stored samples
+        :return: numpy array
+        """
+        if n is None or n > self._count:
+            n = self._count
+
+        end = self._head + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def last(self, default=0.0):
+        """
+        :param default: Value returned if the buffer is empty
+        :return: The newest sample
+        """
+        if self._count == 0:
+            return default
+        return self._data[self._head + self.capacity - 1]
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+
+class Tier:
+    """
+    One time resolution of the history: a RingBuffer of start times and, per field, RingBuffers of the minimum, mean
+    and maximum of the samples each entry stands for. The raw tier holds the samples themselves, so its three
+    statistics are the same buffer.
+    """
+
+    def __init__(self, capacity, raw=False):
+        """
+        Init method
+        :param capacity: Number of entries kept
+        :param raw: Whether the tier holds raw samples rather than aggregates
+        """
+        self.times = RingBuffer(capacity)
+        self.mean = {field: RingBuffer(capacity) for field in FIELDS}
+        if raw:
+            self.low = self.high = self.mean
+        else:
+            self.low = {field: RingBuffer(capacity) for field in FIELDS}
+            self.high = {field: RingBuffer(capacity) for field in FIELDS}
+
+        # Entries added since they were last aggregated into the next tier
+        self.pending = 0
+
+    def wrapped(self):
+        """
+        :return: True once the tier may have overwritten entries, i.e. no longer reaches back to the first sample
+        """
+        return len(self.times) == self.times.capacity
+
+    def aggregate(self, source, n):
+        """
+        Adds one entry per TIER_FACTOR of the newest entries of a finer tier
+        :param source: Finer Tier
+        :param n: Number of its newest entries to combine, a multiple of TIER_FACTOR
+        :return: None
+        """
+        buckets = n // TIER_FACTOR
+        self.times.extend(source.times.view(n)[::TIER_FACTOR])
+        for field in FIELDS:
+            self.low[field].extend(source.low[field].view(n).reshape(buckets, TIER_FACTOR).min(axis=1))
+            self.mean[field].extend(source.mean[field].view(n).reshape(buckets, TIER_FACTOR).mean(axis=1))
+            self.high[field].extend(source.high[field].view(n).reshape(buckets, TIER_FACTOR).max(axis=1))
+
+    def clear(self):
+        self.times.clear()
+        for buffers in (self.low, self.mean, self.high):
+            for buf in buffers.values():
+                buf.clear()
+        self.pending = 0
+
+
+class TelemetryHistory:
+    """
+    Shared store of recent telemetry, one RingBuffer per (origin, field) channel plus a timestamp buffer per origin.
+    All channels of an origin are appended together, so their views line up sample for sample.
+
+    Above the raw samples each origin has a stack of tiers, each holding the minimum, mean and maximum of TIER_FACTOR
+    entries of the tier below, aggregated TIER_BATCH buckets at a time. Every tier has the same capacity, so memory
+    stays fixed while the coarsest tier reaches back capacity * TIER_FACTOR ** levels samples, and window() serves any
+    time span from the finest tier that still covers it.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, levels=DEFAULT_LEVELS):
+        """
+        Init method
+        :param capacity: Number of samples kept per channel and tier
+        :param levels: Number of aggregated tiers above the raw samples
+        """
+        # A tier must hold the entries waiting to be aggregated
+        if levels and capacity < TIER_FACTOR * TIER_BATCH:
+            raise ValueError("TelemetryHistory capacity must be at least " + str(TIER_FACTOR * TIER_BATCH))
+
+        self.capacity = capacity
+        self.levels = levels
+        self._tiers = {}
+        self._times = {}
+        self._channels = {}
+
+        for origin in ORIGINS:
+            tiers = [Tier(capacity, raw=True)] + [Tier(capacity) for level in range(levels)]
+            self._tiers[origin] = tiers
+            self._times[origin] = tiers[0].times
+            for field in FIELDS:
+                self._channels[(origin, field)] = tiers[0].mean[field]
+
+    def append(self, record):
+        """
+        Stores one sample for every channel of the record's origin
+        :param record: Telemetry.FlightRecord
+        :return: None
+        """
+        origin = record.origin
+        self._times[origin].append(record.received)
+        for field in FIELDS:
+            self._channels[(origin, field)].append(getattr(record, field))
+
+        # Passes TIER_BATCH full buckets up the tiers at a time
+        tiers = self._tiers[origin]
+        added = 1
+        for level in range(self.levels):
+            tier = tiers[level]
+            tier.pending += added
+            if tier.pending < TIER_FACTOR * TIER_BATCH:
+                break
+            tiers[level + 1].aggregate(tier, tier.pending)
+            added = tier.pending // TIER_FACTOR
+            tier.pending = 0
+
+    def channel(self, origin, field):
+        return self._channels[(origin, field)]
+
+    def view(self, origin, field, n=None):
+        """
+        :param origin: "balloon" or "rocket"
+        :param field: One of FIELDS
+        :param n: Number of samples, defaults to all stored samples
+        :return: Read-only numpy view of the newest samples, oldest first
+        """
+        return self._channels[(origin, field)].view(n)
+
+    def times(self, origin, n=None):
+        return self._times[origin].view(n)
+
+    def window(self, origin, field, seconds=None):
+        """
+        Returns a channel over a time span, from the finest tier that covers it. The coarser part is completed with
+        the newer entries of the finer tiers that are not aggregated yet, so the window always ends at the newest sample
+        :param origin: "balloon" or "rocket"
+        :param field: One of FIELDS
+        :param seconds: Span before the newest sample, None for the whole flight
+        :return: (times, minimum, mean, maximum) numpy arrays, oldest first
+        """
+        tiers = self._tiers[origin]
+        newest = self._times[origin]
+        start = None if seconds is None or not len(newest) else newest.last() - seconds
+
+        level = len(tiers) - 1
+        for index, tier in enumerate(tiers):
+            if not tier.wrapped() or (start is not None and len(tier.times) and tier.times.view()[0] <= start):
+                level = index
+                break
+
+        if level == 0:
+            raw = tiers[0]
+            times, low, mean, high = (raw.times.view(), raw.low[field].view(), raw.mean[field].view(),
+                                      raw.high[field].view())
+        else:
+            parts = [(tiers[level], None)]
+            parts += [(tiers[index], tiers[index].pending) for index in range(level - 1, -1, -1)]
+            times = np.concatenate([tier.times.view(n) for tier, n in parts])
+            low = np.concatenate([tier.low[field].view(n) for tier, n in parts])
+            mean = np.concatenate([tier.mean[field].view(n) for tier, n in parts])
+            high = np.concatenate([tier.high[field].view(n) for tier, n in parts])
+
+        if start is not None:
+            first = np.searchsorted(times, start)
+            times, low, mean, high = times[first:], low[first:], mean[first:], high[first:]
+
+        return times, low, mean, high
+
+    def clear(self):
+        for tiers in self._tiers.values():
+            for tier in tiers:
+                tier.clear()
@@ -1,4 +1,7 @@
-import time
+# Before the other imports, so they are part of the startup time
+import Startup
+
+import argparse
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
@@ -7,15 +10,20 @@ import RPi.GPIO as GPIO
 from Timer import *
 from DataWindow import DataWindow
 
-# from GraphNotebook import GraphNotebook
 from Mode import Mode
 from communications.RadioModule import Module
 from CommunicationDriver import Comm
+from TelemetryDecoder import TelemetryDecoder
+from FlightRecorder import FlightRecorder, LOG_FOLDER
+from LatencyTracker import LatencyTracker
+from communications.LinkStats import LinkStats
+from communications.Transport import LoopbackTransport, PtySerialTransport
+from LoadGenerator import LoadGenerator
+from IngestScheduler import IngestQueue, IngestScheduler
 
-import threading
-import random
 import queue
-import json
+
+Startup.report.add_phase("imports", Startup.report.started)
 
 OK = "\u001b[32m"
 WARN = "\u001b[33m"
@@ -33,96 +41,105 @@ display and graph all pertinent data from the launch structure.
 
 
 class ThreadedClient:
-    def __init__(self, master):
+    def __init__(self, master, args):
         """
         Init method
         :param master: Master window
+        :param args: Parsed command line arguments
         """
         self.master = master
         # self.master.iconify for the memes
         root.protocol("WM_DELETE_WINDOW", self.end_application)
 
-        # Queue to buffer incoming data
-        self.queue = queue.Queue()
+        # Queue to buffer raw frames from the radio, and queue of the decoded records the GUI displays
+        self.raw_queue = queue.Queue()
+        self.queue = IngestQueue()
+
+        # Sequence tracking of the received telemetry
+        self.link_stats = LinkStats()
 
-        # Create Module class and bind queue
+        # Latency of every stage from the radio callback to the screen
+        self.latency = LatencyTracker()
+
+        # Radio stand-ins for running without hardware, the XBee is used otherwise
+        self.transport = None
+        if args.radio == "loopback":
+            self.transport = LoopbackTransport(args.baud_rate)
+        elif args.radio == "pty":
+            self.transport = PtySerialTransport(args.baud_rate)
+        if self.transport is not None:
+            Module.use_transport(self.transport)
+
+        # Create Module class and bind queue. Created before Comm, which would otherwise create it outside the phase
         # TODO Exception handling
-        self.radio = Module.get_instance(self)
+        with Startup.report.phase("radio"):
+            self.radio = Module.get_instance(self)
+
+        # Outbound commands, acknowledgements from the platform are matched to them by the decoder
+        self.comm = Comm.get_instance(self)
 
-        self.radio.bind_queue(self.queue)
+        # Every received record is persisted to a new flight log
+        with Startup.report.phase("flight recorder"):
+            self.recorder = FlightRecorder()
+            self.recorder.start()
+
+        # Parse and validate frames off the Tk thread
+        self.decoder = TelemetryDecoder(self.raw_queue, self.queue, self.link_stats, self.comm.acknowledge,
+                                        self.recorder, self.radio.link_budget, self.latency)
+        self.decoder.start()
+
+        self.radio.bind_queue(self.raw_queue)
 
         # Window to display all data
-        self.gui = DataWindow(master, self.queue)
+        with Startup.report.phase("data window"):
+            self.gui = DataWindow(master, self.queue, self.link_stats, self.recorder, self.latency)
+
+        # Process data in queue as soon as it arrives
+        self.ingest = IngestScheduler(master, self.gui.process_incoming)
+        self.queue.listener = self.ingest.wake
 
         self.running = 1
 
-        # Create thread to spoof data in queue
-        self.thread1 = threading.Thread(target=self.test_queue)
-        self.thread1.start()
-        
-        # Process data in queue
+        # Spoof telemetry while in test mode, encoded with the radio link's packet format so the decode path runs
+        # without hardware. On the loopback radio it is sent by the simulated platform, through the simulated link
+        submit = self.decoder.submit
+        if isinstance(self.transport, LoopbackTransport):
+            submit = self.transport.inject
+        self.load_generator = LoadGenerator(submit, self.radio.encode,
+                                            args.balloon_rate, args.rocket_rate, args.status_rate,
+                                            args.loss, args.duplication, args.reordering,
+                                            args.burst_period, args.burst_length, args.burst_factor,
+                                            active=self.gui.is_test_mode)
+        self.load_generator.start()
+
         self.update()
 
     def update(self):
-        # Loop function and handle data from interrupts
+        # Periodic housekeeping, telemetry is handled by the ingest scheduler
         try:
-            self.gui.process_incoming()
+            # Also refreshed without traffic, so the load falls back when the link goes quiet
+            self.gui.show_link_load()
+            self.gui.show_radio_state()
+            # Report finished commands
+            self.comm.dispatch_results()
             # Call again
             self.master.after(200, self.update)
         except Exception as e:
-            print("Process Incoming Error")
+            print("Update Error")
             print(e)
 
     def error(self, message):
         messagebox.showinfo("Error", message)
 
-    def test_queue(self):
-        i = 0
-        end = 0
-        while self.running:
-            time.sleep(1)
-            if self.gui.is_test_mode():
-                end = 1
-                origin = "balloon"
-
-                preload = (
-                        '{ "origin" : "' + origin + '",' +
-                        '"GPS": {' +
-                        '"long": ' + str(rand.random())[0:5] + ',' +
-                        '"alt": ' + str(rand.random())[0:5] + ',' +
-                        '"lat": ' + str(rand.random())[0:5] +
-                        '},' +
-                        '"gyro": {' +
-                        '"x": ' + str(rand.random())[0:5] + ',' +
-                        '"y": ' + str(rand.random())[0:5] + ',' +
-                        '"z": ' + str(rand.random())[0:5] +
-                        '},' +
-                        '"temp": ' + str(rand.random())[0:5] + ',' +
-                        '"acc": {' +
-                        '"x": ' + str(rand.random())[0:5] + ',' +
-                        '"y": ' + str(rand.random())[0:5] + ',' +
-                        '"z": ' + str(rand.random())[0:5] +
-                        '}' +
-                        '}'
-                )
-
-                preload2 = (
-                        '{ "origin" : "status",' +
-                        '"QDM" : 1,' +
-                        '"Ignition" : 1,' +
-                        '"Stabilization" : 1,' +
-                        '"PlatRadio" : 1' +
-                        '}'
-                )
-
-                data_json = json.loads(preload)
-                data_json2 = json.loads(preload2)
-                self.queue.put(data_json)
-                self.queue.put(data_json2)
-
     def end_application(self):
         if messagebox.askyesno("Quit", "Do you want to quit?"):
             self.radio.close()
+            self.load_generator.stop()
+            self.queue.listener = None
+            self.ingest.close()
+            self.decoder.stop()
+            self.comm.close()
+            self.recorder.stop()
             self.running = 0
             if self.gui.shutdown_timer is not None:
                 self.gui.shutdown_timer.stop()
@@ -136,8 +153,34 @@ class ThreadedClient:
             return 1
 
 
-rand = random.Random()
-root = tk.Tk()
-
-client = ThreadedClient(root)
+parser = argparse.ArgumentParser(description="Purdue Orbital Ground Station")
+parser.add_argument("--balloon-rate", type=float, default=1.0, help="test mode balloon packets per second")
+parser.add_argument("--rocket-rate", type=float, default=0.0, help="test mode rocket packets per second")
+parser.add_argument("--status-rate", type=float, default=1.0, help="test mode status packets per second")
+parser.add_argument("--loss", type=float, default=0.0, help="test mode packet loss probability")
+parser.add_argument("--duplication", type=float, default=0.0, help="test mode packet duplication probability")
+parser.add_argument("--reordering", type=float, default=0.0, help="test mode packet reordering probability")
+parser.add_argument("--burst-period", type=float, default=0.0,
+                    help="seconds between the starts of two test mode bursts, 0 disables bursts")
+parser.add_argument("--burst-length", type=float, default=0.0, help="seconds a test mode burst lasts")
+parser.add_argument("--burst-factor", type=float, default=1.0, help="multiplier of every test mode rate during a burst")
+parser.add_argument("--radio", default="xbee", choices=("xbee", "loopback", "pty"),
+                    help="radio link: the XBee, a simulated link in the process, or frames over a pseudo terminal")
+parser.add_argument("--baud-rate", type=int, default=9600, help="baud rate of the simulated radio links")
+parser.add_argument("--no-prewarm", action="store_true",
+                    help="do not load the graph modules in the background once the window is shown")
+parser.add_argument(Startup.PROFILE_FLAG, action="store_true",
+                    help="profile the start up and write a report with the time of every phase to the logs folder")
+args = parser.parse_args()
+
+startup = Startup.report
+if args.profile_startup:
+    startup.folder = LOG_FOLDER
+
+with startup.phase("Tk"):
+    root = tk.Tk()
+
+with startup.phase("client"):
+    client = ThreadedClient(root, args)
+startup.wait_first_frame(root, None if args.no_prewarm else startup.start_prewarm)
 root.mainloop()
@@ -2,73 +2,134 @@ import time
 from tkinter import *
 from threading import Timer as ThreadingTimer
 
+# Digits of fractions of a second of logged times, whatever the clock shows
+LOG_DIGITS = 2
+
 
 class Timer:
-    def __init__(self, place_window, row_start, row_span, column_start, column_span, bg):
-        self.milliseconds = 0
-        self.seconds = 0
-        self.minutes = 0
-        self.hours = 0
-        self.start = 0
+    """
+    Clock label counting up from start, HH:MM:SS followed by the given number of fraction digits.
+
+    Elapsed time is taken from the monotonic clock and converted with integer arithmetic, the label is only
+    reconfigured when its text changes, and each tick is scheduled for the moment the shown text next changes, so a
+    clock showing whole seconds wakes up once a second rather than every 10 ms.
+    """
+
+    def __init__(self, place_window, row_start, row_span, column_start, column_span, bg, digits=2):
+        """
+        Init method
+        :param place_window: Window the clock is placed in
+        :param digits: Digits of fractions of a second shown, 0 shows whole seconds
+        """
+        self.digits = digits
+        self.per_second = 10 ** digits
+
+        # time.monotonic() value the clock counts from
+        self.start = 0.0
         self.clock_run = False
+        # Seconds the clock counts in red before it restarts from zero, 0 once the delay is over
+        self.delay = 0
 
-        self.current_time = "00:00:00:00"
+        self.current_time = self.format(0.0)
+        self._after_id = None
 
         self.clock_frame = Label(place_window, font=(
-            'times', 50, 'bold'), bg=bg, fg='white', text="00:00:00:00")
+            'times', 50, 'bold'), bg=bg, fg='white', text=self.current_time)
         self.clock_frame.grid(row=row_start, rowspan=row_span, column=column_start, columnspan=column_span,
                               sticky=N + S + E + W)
 
+    def format(self, elapsed, digits=None):
+        """
+        :param elapsed: Seconds
+        :param digits: Digits of fractions of a second, defaults to the shown ones
+        :return: Clock text
+        """
+        digits = self.digits if digits is None else digits
+        per_second = 10 ** digits
+        ticks = int(elapsed * per_second)
+        seconds, fraction = divmod(ticks, per_second)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+
+        text = "%02d:%02d:%02d" % (hours, minutes, seconds)
+        if digits:
+            text += ":%0*d" % (digits, fraction)
+        return text
+
+    def elapsed(self):
+        """
+        :return: Seconds the clock counts at this moment, 0 if it is stopped
+        """
+        if not self.clock_run:
+            return 0.0
+
+        elapsed = time.monotonic() - self.start
+        # The delay may be over before the next tick restarts the clock
+        if self.delay and elapsed >= self.delay:
+            elapsed -= self.delay
+        return elapsed
+
+    def log_time(self):
+        """
+        :return: Clock text of this moment with LOG_DIGITS fraction digits, for the flight log
+        """
+        return self.format(self.elapsed(), LOG_DIGITS)
+
+    def start_clock(self):
+        """
+        Starts counting from zero
+        :return: None
+        """
+        self.start = time.monotonic()
+        self.clock_run = True
+        self.delay = 0
+        self.clock_frame.config(foreground="white")
+        self.tick()
+
+    def start_delay(self, secs=5):
+        """
+        Counts in red for secs seconds, then restarts from zero in white
+        :param secs: Length of the delay
+        :return: None
+        """
+        self.start = time.monotonic()
+        self.clock_run = True
+        self.delay = secs
+        self.clock_frame.config(foreground="red")
+        self.tick()
+
     def tick(self):
-        current_time = str(time.time() - self.start)
-        dot = current_time.find('.')
-        self.milliseconds = current_time[dot + 1:dot + 3]
-        self.seconds = int(current_time[:dot])
-        self.minutes = int(self.seconds) // 60
-        self.seconds = int(self.seconds) % 60
-        self.hours = int(self.minutes) // 60
-        self.minutes = int(self.minutes) % 60
-
-        self.current_time = str(self.hours).zfill(2) + ":" + str(self.minutes).zfill(2) + ":" + str(self.seconds).zfill(
-            2) + ":" + str(self.milliseconds).zfill(2)
-
-        self.clock_frame.config(text=str(self.hours).zfill(2) + ":" + str(self.minutes).zfill(2)
-                                + ":" + str(self.seconds).zfill(2) + ":" + str(self.milliseconds).zfill(2))
-
-        if self.clock_run:
-            self.clock_frame.after(10, self.tick)
-        else:
-            self.current_time = "00:00:00:00"
-            self.clock_frame.config(text="00:00:00:00")
-
-    def delay_tick(self, secs=5):
-        current_time = str(time.time() - self.start)
-
-        if 'e' not in current_time:
-            dot = current_time.find('.')
-            self.milliseconds = current_time[dot + 1:dot + 3]
-            self.seconds = int(current_time[:dot])
-            self.minutes = int(self.seconds) // 60
-            self.seconds = int(self.seconds) % 60
-            self.hours = int(self.minutes) // 60
-            self.minutes = int(self.minutes) % 60
-
-        self.current_time = str(self.hours).zfill(2) + ":" + str(self.minutes).zfill(2) + ":" + str(self.seconds).zfill(
-            2) + ":" + str(self.milliseconds).zfill(2)
-
-        self.clock_frame.config(text=str(self.hours).zfill(2) + ":" + str(self.minutes).zfill(2)
-                                + ":" + str(self.seconds).zfill(2) + ":" + str(self.milliseconds).zfill(2))
-
-        if self.clock_run and int(self.seconds) >= secs:
-            self.start = time.time()
+        if self._after_id is not None:
+            self.clock_frame.after_cancel(self._after_id)
+            self._after_id = None
+
+        if not self.clock_run:
+            self._show(0.0)
+            return
+
+        elapsed = time.monotonic() - self.start
+        if self.delay and elapsed >= self.delay:
+            self.start += self.delay
+            elapsed -= self.delay
+            self.delay = 0
             self.clock_frame.config(foreground="white")
-            self.clock_frame.after(10, self.tick)
-        else:
-            self.clock_frame.config(foreground="red")
-            self.clock_frame.after(10, lambda: self.delay_tick(secs))
+
+        self._show(elapsed)
+
+        # Wake up when the shown text changes next
+        next_change = (int(elapsed * self.per_second) + 1) / self.per_second
+        wait = int((next_change - elapsed) * 1000) + 1
+        self._after_id = self.clock_frame.after(wait, self.tick)
+
+    def _show(self, elapsed):
+        text = self.format(elapsed)
+        if text != self.current_time:
+            self.current_time = text
+            self.clock_frame.config(text=text)
 
     def reset(self):
         self.clock_run = False
+        self.tick()
 
 
 class ShutdownTimer(object):
@@ -0,0 +1,133 @@
+import collections
+import threading
+import time
+
+from communications.Transport import FRAME_OVERHEAD
+
+# Seconds of traffic the rates are averaged over
+DEFAULT_WINDOW = 5.0
+
+# Fraction of the channel the downlink should stay under, the rest is kept free for commands and retries
+TARGET_UTILISATION = 0.7
+
+# Telemetry origins whose rate can be adjusted, status packets are small and always sent
+ADJUSTABLE_ORIGINS = ("balloon", "rocket")
+
+
+class LinkBudget:
+    """
+    Byte accounting of the radio link.
+
+    Counts the bytes of every frame received and sent, XBee API framing included, over a sliding window, and compares
+    them with the capacity of the serial link (baud rate / 10 bytes per second with 8N1 framing). From the average
+    frame size of each origin it recommends downlink rates that keep the channel under TARGET_UTILISATION, so
+    commands are not queued behind telemetry. Safe to use from any thread.
+    """
+
+    def __init__(self, baud_rate, window=DEFAULT_WINDOW):
+        """
+        Init method
+        :param baud_rate: Baud rate of the radio's serial link
+        :param window: Seconds of traffic the rates are averaged over
+        """
+        self.capacity = baud_rate / 10.0
+        self.window = window
+
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+        # (time, origin, bytes) per frame, origin is None for sent frames and frames that could not be decoded
+        self._received = collections.deque()
+        self._sent = collections.deque()
+        self._lock = threading.Lock()
+
+    def count_received(self, size, origin=None, when=None):
+        """
+        :param size: Payload bytes of the received frame
+        :param origin: Origin of the decoded packet, None if it could not be decoded
+        :param when: Receive time, defaults to now
+        :return: None
+        """
+        with self._lock:
+            self.bytes_received += size + FRAME_OVERHEAD
+            self._received.append((time.time() if when is None else when, origin, size + FRAME_OVERHEAD))
+
+    def count_sent(self, size, when=None):
+        """
+        :param size: Payload bytes of the sent frame
+        :param when: Send time, defaults to now
+        :return: None
+        """
+        with self._lock:
+            self.bytes_sent += size + FRAME_OVERHEAD
+            self._sent.append((time.time() if when is None else when, None, size + FRAME_OVERHEAD))
+
+    def downlink_rate(self):
+        """
+        :return: Bytes per second received over the window
+        """
+        with self._lock:
+            self._prune()
+            return sum(size for when, origin, size in self._received) / self.window
+
+    def uplink_rate(self):
+        """
+        :return: Bytes per second sent over the window
+        """
+        with self._lock:
+            self._prune()
+            return sum(size for when, origin, size in self._sent) / self.window
+
+    def utilisation(self):
+        """
+        :return: Fraction of the link capacity used by both directions over the window
+        """
+        return (self.downlink_rate() + self.uplink_rate()) / self.capacity
+
+    def recommended_rates(self):
+        """
+        Splits the downlink budget left after the uplink and the other origins evenly between the adjustable origins
+        that were received over the window
+        :return: dict of origin to recommended packets per second
+        """
+        with self._lock:
+            self._prune()
+            frames = collections.defaultdict(list)
+            for when, origin, size in self._received:
+                frames[origin].append(size)
+            uplink = sum(size for when, origin, size in self._sent) / self.window
+
+        fixed = sum(sum(sizes) for origin, sizes in frames.items() if origin not in ADJUSTABLE_ORIGINS) / self.window
+        budget = max(0.0, self.capacity * TARGET_UTILISATION - uplink - fixed)
+
+        adjustable = [origin for origin in ADJUSTABLE_ORIGINS if frames[origin]]
+        rates = {}
+        for origin in adjustable:
+            mean_size = sum(frames[origin]) / len(frames[origin])
+            rates[origin] = budget / len(adjustable) / mean_size
+        return rates
+
+    def snapshot(self):
+        """
+        :return: dict of the current figures, for the GUI and diagnostics
+        """
+        downlink = self.downlink_rate()
+        uplink = self.uplink_rate()
+        return {"capacity": self.capacity,
+                "downlink": downlink,
+                "uplink": uplink,
+                "utilisation": (downlink + uplink) / self.capacity,
+                "recommended_rates": self.recommended_rates()}
+
+    def reset(self):
+        with self._lock:
+            self._received.clear()
+            self._sent.clear()
+            self.bytes_received = 0
+            self.bytes_sent = 0
+
+    def _prune(self):
+        oldest = time.time() - self.window
+        for frames in (self._received, self._sent):
+            while frames and frames[0][0] < oldest:
+                frames.popleft()
@@ -0,0 +1,216 @@
+import threading
+from collections import OrderedDict
+
+# Sequence numbers are 16 bit on the wire
+SEQ_MODULUS = 1 << 16
+
+# A jump forward larger than this is treated as the sender restarting, not as lost packets. Jumps back are a restart
+# once they leave the rolling window, or repeat RESTART_RUN consecutive sequence numbers
+MAX_GAP = 1000
+
+# Number of sequence numbers the rolling loss rate is computed over
+DEFAULT_WINDOW = 200
+
+# Consecutive sequence numbers that already arrived after which the sender is taken to have restarted behind them
+RESTART_RUN = 3
+
+
+class OriginStats:
+    """
+    Link quality counters for one packet origin (balloon, rocket or status)
+    """
+
+    def __init__(self, window):
+        self.window = window
+
+        self.received = 0
+        self.lost = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.untracked = 0
+        self.restarts = 0
+
+        # Smoothed variation of the inter-arrival time, in seconds
+        self.jitter = 0.0
+        self.mean_interval = 0.0
+
+        self._expected = None
+        self._last_arrival = None
+        self._last_interval = None
+        # seq -> True if received, False if still missing, newest last
+        self._recent = OrderedDict()
+        # Last of the consecutive sequence numbers counted as duplicates, and how many there were
+        self._repeat_seq = None
+        self._repeat_run = 0
+
+    def observe(self, seq, arrival):
+        self._observe_timing(arrival)
+
+        if seq is None:
+            self.untracked += 1
+            self.received += 1
+            return
+
+        seq %= SEQ_MODULUS
+        if self._expected is None:
+            self._accept(seq)
+            return
+
+        ahead = (seq - self._expected) % SEQ_MODULUS
+        if ahead == 0:
+            self._accept(seq)
+
+        elif ahead < SEQ_MODULUS // 2:
+            if ahead > MAX_GAP:
+                # Sender restarted, start counting again from this packet
+                self._restart(seq)
+            else:
+                for i in range(ahead):
+                    self._remember((self._expected + i) % SEQ_MODULUS, False)
+                self.lost += ahead
+                self._accept(seq)
+
+        elif seq not in self._recent:
+            # Too far back to be a late or repeated packet of the window, the sender restarted, e.g. at 0 after a
+            # reboot
+            self._restart(seq)
+
+        elif not self._recent[seq]:
+            # A packet counted as lost arrived late
+            self._recent[seq] = True
+            self.lost -= 1
+            self.reordered += 1
+            self.received += 1
+
+        elif seq == self._repeat_seq_next() and self._repeat_run + 1 >= RESTART_RUN:
+            # A run of consecutive repeats is a sender that restarted less than a window ago, the earlier ones of
+            # the run were new packets too
+            self.duplicates -= self._repeat_run
+            self.received += self._repeat_run
+            self._restart(seq)
+
+        else:
+            self._repeat_run = self._repeat_run + 1 if seq == self._repeat_seq_next() else 1
+            self._repeat_seq = seq
+            self.duplicates += 1
+
+    def recent(self):
+        """
+        :return: (sequence numbers in the rolling window, how many of them never arrived)
+        """
+        return len(self._recent), sum(1 for got in self._recent.values() if not got)
+
+    def loss_rate(self):
+        """
+        :return: Fraction of the last `window` sequence numbers that never arrived
+        """
+        tracked, missing = self.recent()
+        return missing / tracked if tracked else 0.0
+
+    def _accept(self, seq):
+        self.received += 1
+        self._remember(seq, True)
+        self._expected = (seq + 1) % SEQ_MODULUS
+        self._repeat_seq = None
+        self._repeat_run = 0
+
+    def _restart(self, seq):
+        self.restarts += 1
+        self._recent.clear()
+        self._accept(seq)
+
+    def _repeat_seq_next(self):
+        if self._repeat_seq is None:
+            return None
+        return (self._repeat_seq + 1) % SEQ_MODULUS
+
+    def _remember(self, seq, got):
+        self._recent.pop(seq, None)
+        self._recent[seq] = got
+        while len(self._recent) > self.window:
+            self._recent.popitem(last=False)
+
+    def _observe_timing(self, arrival):
+        if self._last_arrival is not None:
+            interval = arrival - self._last_arrival
+            self.mean_interval += (interval - self.mean_interval) / 16
+            if self._last_interval is not None:
+                # Same smoothing as the RFC 3550 interarrival jitter, without sender timestamps
+                self.jitter += (abs(interval - self._last_interval) - self.jitter) / 16
+            self._last_interval = interval
+        self._last_arrival = arrival
+
+
+class LinkStats:
+    """
+    Per-origin sequence tracking of received telemetry: gaps, duplicates, late (reordered) packets, rolling loss rate
+    and inter-arrival jitter.
+
+    Records are observed on the decoder thread and read from the Tk thread, so every access takes the lock.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """
+        Init method
+        :param window: Number of sequence numbers the rolling loss rate is computed over
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._origins = {}
+
+    def observe(self, record):
+        """
+        Accounts for one received record
+        :param record: Any telemetry record with origin, seq and received fields
+        :return: None
+        """
+        with self._lock:
+            stats = self._origins.get(record.origin)
+            if stats is None:
+                stats = self._origins[record.origin] = OriginStats(self.window)
+            stats.observe(record.seq, record.received)
+
+    def reset(self):
+        with self._lock:
+            self._origins = {}
+
+    def received(self):
+        with self._lock:
+            return sum(stats.received for stats in self._origins.values())
+
+    def lost(self):
+        with self._lock:
+            return sum(stats.lost for stats in self._origins.values())
+
+    def received_percentage(self):
+        """
+        :return: Percentage of the recent packets that arrived, over every origin, or None before the first packet
+        """
+        with self._lock:
+            if not self._origins:
+                return None
+
+            tracked = 0
+            missing = 0
+            for stats in self._origins.values():
+                window_tracked, window_missing = stats.recent()
+                tracked += window_tracked
+                missing += window_missing
+
+            return 100.0 * (1 - missing / tracked) if tracked else 100.0
+
+    def snapshot(self):
+        """
+        :return: dict of origin -> dict of counters, safe to read on any thread
+        """
+        with self._lock:
+            return {origin: {"received": stats.received,
+                             "lost": stats.lost,
+                             "duplicates": stats.duplicates,
+                             "reordered": stats.reordered,
+                             "untracked": stats.untracked,
+                             "restarts": stats.restarts,
+                             "loss_rate": stats.loss_rate(),
+                             "jitter": stats.jitter,
+                             "mean_interval": stats.mean_interval}
+                    for origin, stats in self._origins.items()}
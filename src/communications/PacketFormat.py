@@ -0,0 +1,240 @@
+"""
+Telemetry packet encodings.
+
+Two encodings share one set of records:
+
+JSON    The res/json_format layout, plus an optional 16 bit "seq" key. Verbose (~200 bytes for a balloon packet) but
+        readable, kept as the fallback.
+BINARY  Versioned fixed layout, little endian:
+
+            header   version (B), type (B), sequence number (H)
+            payload  balloon/rocket: longitude (d), latitude (d), altitude, temperature, acc x/y/z, gyro x/y/z (8f)
+                     status: bit field (B), bit 0 QDM, 1 Ignition, 2 Stabilization, 3 PlatRadio
+                     ack: id of the acknowledged command (H)
+            crc      CRC-16/CCITT of header and payload (H)
+
+        A balloon packet is 54 bytes. The version byte is never '{', so decode() tells the encodings apart by the
+        first byte of the frame.
+"""
+import binascii
+import json
+import math
+import struct
+
+from Telemetry import FlightRecord, StatusRecord, AckRecord
+from util.exception import TelemetryDecodeException
+
+JSON = "json"
+BINARY = "binary"
+
+VERSION = 1
+
+TYPE_BALLOON = 1
+TYPE_ROCKET = 2
+TYPE_STATUS = 3
+TYPE_ACK = 4
+
+HEADER = struct.Struct("<BBH")
+FLIGHT = struct.Struct("<dd8f")
+STATUS = struct.Struct("<B")
+ACK = struct.Struct("<H")
+CRC = struct.Struct("<H")
+
+_TYPES = {"balloon": TYPE_BALLOON, "rocket": TYPE_ROCKET, "status": TYPE_STATUS, "ack": TYPE_ACK}
+_ORIGINS = {TYPE_BALLOON: "balloon", TYPE_ROCKET: "rocket", TYPE_STATUS: "status", TYPE_ACK: "ack"}
+
+
+def _crc(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode(record, fmt=BINARY):
+    """
+    Encodes a record for the radio
+    :param record: FlightRecord, StatusRecord or AckRecord
+    :param fmt: BINARY or JSON
+    :return: bytes
+    """
+    if fmt == JSON:
+        return encode_json(record)
+    elif fmt == BINARY:
+        return encode_binary(record)
+
+    raise ValueError("Unknown packet format: " + repr(fmt))
+
+
+def encode_binary(record):
+    seq = 0 if record.seq is None else record.seq & 0xFFFF
+    header = HEADER.pack(VERSION, _TYPES[record.origin], seq)
+
+    if record.origin == "status":
+        payload = STATUS.pack(record.qdm | record.ignition << 1 | record.stabilization << 2 | record.plat_radio << 3)
+    elif record.origin == "ack":
+        payload = ACK.pack(record.command_id & 0xFFFF)
+    else:
+        payload = FLIGHT.pack(record.longitude, record.latitude, record.altitude, record.temperature,
+                              record.acc_x, record.acc_y, record.acc_z,
+                              record.gyro_x, record.gyro_y, record.gyro_z)
+
+    packet = header + payload
+    return packet + CRC.pack(_crc(packet))
+
+
+def encode_json(record):
+    if record.origin == "status":
+        data = {"origin": "status", "QDM": record.qdm, "Ignition": record.ignition,
+                "Stabilization": record.stabilization, "PlatRadio": record.plat_radio}
+    elif record.origin == "ack":
+        data = {"origin": "ack", "id": record.command_id}
+    else:
+        data = {"origin": record.origin, "alt": record.altitude,
+                "GPS": {"long": record.longitude, "lat": record.latitude},
+                "gyro": {"x": record.gyro_x, "y": record.gyro_y, "z": record.gyro_z},
+                "temp": record.temperature,
+                "acc": {"x": record.acc_x, "y": record.acc_y, "z": record.acc_z}}
+
+    if record.seq is not None:
+        data["seq"] = record.seq & 0xFFFF
+
+    return json.dumps(data, separators=(",", ":")).encode("utf8")
+
+
+def detect(raw):
+    """
+    :param raw: One received frame
+    :return: BINARY or JSON
+    """
+    if isinstance(raw, (bytes, bytearray)) and len(raw) and raw[0] == VERSION:
+        return BINARY
+    return JSON
+
+
+def peek(raw):
+    """
+    Reads the header of a binary packet without validating it
+    :param raw: Binary packet
+    :return: (origin, sequence number), origin is None for unknown packet types
+    """
+    version, packet_type, seq = HEADER.unpack_from(raw)
+    return _ORIGINS.get(packet_type), seq
+
+
+def decode(raw, received):
+    """
+    Turns a raw frame of either encoding into a record
+    :param raw: bytes or str holding one packet
+    :param received: Time the packet was received
+    :return: FlightRecord, StatusRecord or AckRecord
+    """
+    if detect(raw) == BINARY:
+        return decode_binary(raw, received)
+
+    if isinstance(raw, (bytes, bytearray)):
+        try:
+            raw = raw.decode("utf8")
+        except UnicodeDecodeError as e:
+            raise TelemetryDecodeException("Packet is not valid UTF-8: " + repr(e))
+
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise TelemetryDecodeException("Packet is not valid JSON: " + repr(e))
+
+    if not isinstance(data, dict):
+        raise TelemetryDecodeException("Packet is not a JSON object")
+
+    return decode_json(data, received)
+
+
+def decode_binary(raw, received):
+    if len(raw) < HEADER.size + CRC.size:
+        raise TelemetryDecodeException("Binary packet too short: " + str(len(raw)) + " bytes")
+
+    body = raw[:-CRC.size]
+    crc, = CRC.unpack_from(raw, len(body))
+    if crc != _crc(body):
+        raise TelemetryDecodeException("Binary packet failed CRC check")
+
+    version, packet_type, seq = HEADER.unpack_from(body)
+    origin = _ORIGINS.get(packet_type)
+    payload_size = len(body) - HEADER.size
+
+    if origin == "status":
+        if payload_size != STATUS.size:
+            raise TelemetryDecodeException("Bad status payload size: " + str(payload_size))
+        flags, = STATUS.unpack_from(body, HEADER.size)
+        return StatusRecord(origin, seq, received, flags & 1, flags >> 1 & 1, flags >> 2 & 1, flags >> 3 & 1)
+
+    elif origin == "ack":
+        if payload_size != ACK.size:
+            raise TelemetryDecodeException("Bad ack payload size: " + str(payload_size))
+        command_id, = ACK.unpack_from(body, HEADER.size)
+        return AckRecord(origin, seq, received, command_id)
+
+    elif origin is not None:
+        if payload_size != FLIGHT.size:
+            raise TelemetryDecodeException("Bad " + origin + " payload size: " + str(payload_size))
+        values = FLIGHT.unpack_from(body, HEADER.size)
+        for value in values:
+            if not math.isfinite(value):
+                raise TelemetryDecodeException("Reading is not finite: " + repr(value))
+
+        longitude, latitude, altitude, temperature, acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z = values
+        return FlightRecord(origin, seq, received, altitude, longitude, latitude, temperature,
+                            acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z)
+
+    raise TelemetryDecodeException("Unknown packet type: " + str(packet_type))
+
+
+def _number(value):
+    # bool is an int subclass, but true/false is never a valid reading
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TelemetryDecodeException("Expected a number, got " + repr(value))
+    if not math.isfinite(value):
+        raise TelemetryDecodeException("Reading is not finite: " + repr(value))
+    return float(value)
+
+
+def _flag(value):
+    if value not in (0, 1):
+        raise TelemetryDecodeException("Expected 0 or 1, got " + repr(value))
+    return int(value)
+
+
+def decode_json(data, received):
+    """
+    Validates a parsed JSON packet in the res/json_format layout and converts it to a record
+    :param data: dict from json.loads
+    :param received: Time the packet was received
+    :return: FlightRecord, StatusRecord or AckRecord
+    """
+    try:
+        origin = data["origin"]
+        seq = data.get("seq")
+        if seq is not None:
+            seq = int(seq)
+
+        if origin == "balloon" or origin == "rocket":
+            gps = data["GPS"]
+            gyro = data["gyro"]
+            acc = data["acc"]
+            # Older packets carry the altitude inside the GPS object
+            altitude = data["alt"] if "alt" in data else gps["alt"]
+
+            return FlightRecord(origin, seq, received,
+                                _number(altitude), _number(gps["long"]), _number(gps["lat"]), _number(data["temp"]),
+                                _number(acc["x"]), _number(acc["y"]), _number(acc["z"]),
+                                _number(gyro["x"]), _number(gyro["y"]), _number(gyro["z"]))
+
+        elif origin == "status":
+            return StatusRecord(origin, seq, received,
+                                _flag(data["QDM"]), _flag(data["Ignition"]), _flag(data["Stabilization"]),
+                                _flag(data["PlatRadio"]))
+
+        elif origin == "ack":
+            return AckRecord(origin, seq, received, int(data["id"]))
+
+    except (KeyError, TypeError, ValueError) as e:
+        raise TelemetryDecodeException("Malformed packet: " + repr(e))
+
+    raise TelemetryDecodeException("Unknown origin: " + repr(origin))
@@ -0,0 +1,139 @@
+import os
+import threading
+
+import Startup
+from ConnectionState import ConnectionState
+
+# Seconds before the first retry of a failed connect, doubled after every failure up to MAX_BACKOFF
+BACKOFF = 0.5
+MAX_BACKOFF = 10.0
+
+# Seconds between checks of the serial device and the open link
+POLL_INTERVAL = 1.0
+
+
+class RadioConnector:
+    """
+    Brings the radio link up on a background thread and keeps it up.
+
+    The first connect no longer holds up the window, which can take the whole XBee sync ops timeout. A failed connect
+    is retried with an exponential backoff, and while the serial device of the radio does not exist, e.g. the USB
+    radio is unplugged, the connector only waits for it to appear. Once connected, it closes the link as soon as the
+    device disappears and starts over, so a radio plugged back in is picked up without restarting the program. The
+    state is kept in state, for the GUI to show.
+    """
+
+    def __init__(self, radio, port=None, backoff=BACKOFF, max_backoff=MAX_BACKOFF, poll_interval=POLL_INTERVAL):
+        """
+        Init method
+        :param radio: ModuleSingleton whose connect() and disconnect() are called
+        :param port: Path of the radio's serial device, None if the transport has no device to watch
+        :param backoff: Seconds before the first retry
+        :param max_backoff: Maximum seconds between retries
+        :param poll_interval: Seconds between checks of the device and the link
+        """
+        self.radio = radio
+        self.port = port
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+
+        self.state = ConnectionState.DISCONNECTED
+        self.attempts = 0
+        self.connects = 0
+
+        self._reset_requested = False
+        self._running = False
+        self._wake = threading.Event()
+        self.thread = None
+
+    def start(self):
+        # The start up report waits for the first connect attempt, usually the slowest step of the start up
+        Startup.report.hold()
+        self._running = True
+        self.thread = threading.Thread(target=self._run, name="RadioConnector", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def reset(self):
+        """
+        Asks for a reset of the radio, or for an immediate connect attempt if it is not connected. Returns at once
+        :return: None
+        """
+        self._reset_requested = True
+        self._wake.set()
+
+    def device_present(self):
+        """
+        :return: False if the radio's serial device is known and does not exist
+        """
+        # Only device nodes can be watched, e.g. not the COM ports of Windows
+        if self.port is None or not self.port.startswith("/dev/"):
+            return True
+        return os.path.exists(self.port)
+
+    def _wait(self, seconds):
+        self._wake.wait(seconds)
+        self._wake.clear()
+
+    def _run(self):
+        delay = self.backoff
+        first = True
+
+        while self._running:
+            if self.state != ConnectionState.CONNECTED:
+                self._reset_requested = False
+                if not self.device_present():
+                    self.state = ConnectionState.DISCONNECTED
+                    if first:
+                        first = False
+                        print("Radio device " + self.port + " not found, waiting for it")
+                        Startup.report.release()
+                    self._wait(self.poll_interval)
+                    continue
+
+                self.state = ConnectionState.CONNECTING
+                self.attempts += 1
+                if first:
+                    first = False
+                    with Startup.report.phase("radio open"):
+                        connected = self.radio.connect()
+                    Startup.report.release()
+                else:
+                    connected = self.radio.connect()
+
+                if connected:
+                    self.state = ConnectionState.CONNECTED
+                    self.connects += 1
+                    delay = self.backoff
+                else:
+                    self.state = ConnectionState.DISCONNECTED
+                    self._wait(delay)
+                    delay = min(delay * 2, self.max_backoff)
+                continue
+
+            if self._reset_requested:
+                self._reset_requested = False
+                self.state = ConnectionState.CONNECTING
+                if self.radio.reset():
+                    self.state = ConnectionState.CONNECTED
+                else:
+                    self.radio.disconnect()
+                    self.state = ConnectionState.DISCONNECTED
+                continue
+
+            if not self.device_present() or not self.radio.transport.is_open():
+                print("Radio disconnected")
+                self.radio.disconnect()
+                self.state = ConnectionState.DISCONNECTED
+                delay = self.backoff
+                continue
+
+            self._wait(self.poll_interval)
+
+        if first:
+            Startup.report.release()
+        self.state = ConnectionState.DISCONNECTED
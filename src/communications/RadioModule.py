@@ -1,14 +1,16 @@
 import logging
 import sys
 import traceback
-import json
 import os
-import serial
+import time
 
 from sys import platform
 
-from digi.xbee.devices import XBeeDevice, XBee64BitAddress, RemoteXBeeDevice, XBeeException
-from util.exception import GroundStationException, RadioSerialConnectionException
+from util.exception import GroundStationException, RadioException, RadioSerialConnectionException
+from communications import PacketFormat
+from communications.Transport import XBeeTransport
+from communications.LinkBudget import LinkBudget
+from communications.RadioConnector import RadioConnector
 
 # Local port number:
 # - For linux, it will be '/dev/ttyS#'
@@ -37,6 +39,7 @@ NORM = "\u001b[0m"
 
 class Module:
     __instance = None
+    __transport = None
 
     def get_instance(self):
         if Module.__instance is None:
@@ -44,67 +47,126 @@ class Module:
             Module()
         return Module.__instance
 
+    @staticmethod
+    def use_transport(transport):
+        """
+        Sets the transport the radio is created with, instead of the XBee on LOCAL_PORT.
+        Must be called before the first get_instance
+        :param transport: communications.Transport.Transport
+        :return: None
+        """
+        if Module.__instance is not None:
+            raise Exception("The radio has already been created")
+        Module.__transport = transport
+
     def __init__(self):
         if Module.__instance is not None:
             # print(Module.__instance)
             raise Exception("Constructor should not be called")
         else:
-            Module.__instance = ModuleSingleton()
+            Module.__instance = ModuleSingleton(Module.__transport)
 
 
 class ModuleSingleton:
-    def __init__(self):
+    def __init__(self, transport=None):
 
         self.is_local_device_init = 0
 
         # Remote node MAC address in hexadecimal format
         self.REMOTE_NODE_ADDRESS = "0013A2004148887C"
 
+        # Telemetry encoding used on this link. Received frames are decoded in either format
+        self.packet_format = PacketFormat.JSON
+
+        self.queue = None
+
+        self.transport = transport if transport is not None else XBeeTransport(LOCAL_PORT, BAUD_RATE)
+
+        # Bytes over the air in both directions. Sent frames are counted here, received ones by the TelemetryDecoder
+        self.link_budget = LinkBudget(self.transport.baud_rate)
+
+        def data_receive_callback(data):
+            # Only stamp and queue the frame, the TelemetryDecoder parses it so the radio reader never backs up
+            if self.queue is not None:
+                self.queue.put((data, time.time()))
+
+        self.transport.set_receive_callback(data_receive_callback)
+
+        # Opens the radio in the background and reopens it when it was lost, so the window does not wait for it
+        self.connector = RadioConnector(self, getattr(self.transport, "port", None))
+        self.connector.start()
+
+    @property
+    def connection_state(self):
+        """
+        :return: ConnectionState of the link to the local radio
+        """
+        return self.connector.state
+
+    def connect(self):
+        """
+        Opens the radio. Can take up to the XBee's sync ops timeout when the radio does not answer, called by the
+        RadioConnector
+        :return: True if the radio is open
+        """
         try:
-            self.device = XBeeDevice(LOCAL_PORT, BAUD_RATE)
-            self.device.set_sync_ops_timeout(10)
-            self.device.open()
+            self.transport.open(self.REMOTE_NODE_ADDRESS)
             self.is_local_device_init = 1
-        except serial.SerialException:
-            # raise RadioSerialConnectionException
+        except RadioSerialConnectionException:
             print(ERR + "Serial Exception" + NORM)
             print("Local radio not connected\n")
             self.is_local_device_init = 0
+        except RadioException as e:
+            print(ERR + "Radio Error" + NORM)
+            print(e)
+            self.is_local_device_init = 0
 
-        def data_receive_callback(msg):
-            data = msg.data.decode("utf8")
-            json_data = json.loads(data)
-            # print(json_data)
-            self.queue.put(json_data)
+        return bool(self.is_local_device_init)
 
+    def disconnect(self):
+        """
+        Closes the radio after it was lost, called by the RadioConnector
+        :return: None
+        """
+        self.is_local_device_init = 0
         try:
-            self.device.add_data_received_callback(data_receive_callback)
+            self.transport.close()
         except Exception as e:
-            print(ERR + "Callback Failure" + NORM)
+            print(ERR + "Closing Error" + NORM)
             print(e)
-            print("\n")
-            # self.reset_radio()
-
-        self.remote_device = None
-        self.queue = None
 
+    def reset(self):
+        """
+        Resets the radio, called by the RadioConnector
+        :return: True if the radio is open afterwards
+        """
+        print(WARN + "Resetting Radio Connection" + NORM)
         try:
-            self.remote_device = RemoteXBeeDevice(self.device,
-                                                  XBee64BitAddress.from_hex_string(self.REMOTE_NODE_ADDRESS))
-            print("Remote Device Address: " + str(self.remote_device))
-            if self.remote_device is None:
-                print(ERR + "Could not find the remote device" + NORM)
-        except XBeeException:
-            print(ERR + "Remote Device Instantiation Error" + NORM)
-
-    def send(self, data):
+            self.transport.reset()
+            self.is_local_device_init = int(self.transport.is_open())
+        except RadioException as e:
+            print(ERR + "Reset Error" + NORM)
+            print(e)
+            self.is_local_device_init = 0
+
+        return bool(self.is_local_device_init)
+
+    def send(self, data, wait=True):
+        """
+        Transmits data to the remote radio
+        :param data: Payload to send
+        :param wait: Wait for the radio's transmit status (up to the sync ops timeout). Without waiting the call
+                     returns as soon as the frame is written to the local radio
+        :return: 1 if the data was sent, 0 otherwise
+        """
         try:
-            self.device.send_data(self.remote_device, data)
+            self.transport.send(data, wait)
+            self.link_budget.count_sent(len(data))
             print(OK + "Sent" + NORM)
 
             return 1
 
-        except XBeeException as e:
+        except RadioException as e:
             print(ERR + "Sending Error" + NORM)
             print(repr(e))
             traceback.print_exc()
@@ -112,16 +174,36 @@ class ModuleSingleton:
 
             return 0
 
+    def encode(self, record):
+        """
+        Encodes a telemetry record with this link's packet format
+        :param record: FlightRecord or StatusRecord
+        :return: bytes
+        """
+        return PacketFormat.encode(record, self.packet_format)
+
+    def get_packet_format(self):
+        return self.packet_format
+
+    def set_packet_format(self, fmt):
+        if fmt not in (PacketFormat.JSON, PacketFormat.BINARY):
+            raise ValueError("Unknown packet format: " + repr(fmt))
+        self.packet_format = fmt
+
     def bind_queue(self, queue):
         self.queue = queue
 
     def reset_radio(self):
-        print(WARN + "Resetting Radio Connection" + NORM)
-        self.device.reset()
+        """
+        Resets the radio, or connects it if it is not connected, on the connector's thread
+        :return: None
+        """
+        self.connector.reset()
 
     def close(self):
+        self.connector.stop()
         try:
-            self.device.close()
+            self.transport.close()
         except Exception as e:
             print(ERR + "Closing Error" + NORM)
             print(e)
@@ -131,5 +213,5 @@ class ModuleSingleton:
 
     def set_remote_node_address(self, new_address):
         self.REMOTE_NODE_ADDRESS = new_address
+        self.transport.set_remote_address(new_address)
         print(self.REMOTE_NODE_ADDRESS)
-
@@ -0,0 +1,467 @@
+"""
+Radio transports.
+
+ModuleSingleton sends and receives frames through a Transport, so the radio stack runs the same against the real
+XBee or a stand-in:
+
+XBeeTransport        digi-xbee device on a serial port, the field setup
+LoopbackTransport    In-process simulated link with the throughput of a serial baud rate, latency and loss, and a
+                     simulated platform that telemetry can be injected from
+PtySerialTransport   Frames over a pseudo terminal, so a separate program can play the platform through a serial port
+"""
+import heapq
+import json
+import os
+import random
+import threading
+import time
+
+from util.exception import RadioException, RadioSerialConnectionException
+
+# Bytes an XBee API transmit frame adds around the payload
+FRAME_OVERHEAD = 18
+
+# Start delimiter of the frames on a PtySerialTransport, as in XBee API frames
+START_DELIMITER = 0x7E
+
+
+class Transport:
+    """
+    Interface of a radio link. Received frames are handed to the receive callback on the transport's own thread.
+    Implementations also have a baud_rate attribute, the speed of the serial link to the radio
+    """
+
+    def __init__(self):
+        self.receive_callback = None
+
+    def set_receive_callback(self, callback):
+        """
+        :param callback: Called with the payload of every received frame
+        :return: None
+        """
+        self.receive_callback = callback
+
+    def open(self, remote_address):
+        """
+        Opens the link
+        :param remote_address: 64 bit address of the remote radio in hexadecimal
+        :return: None
+        """
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def is_open(self):
+        raise NotImplementedError
+
+    def send(self, data, wait=True):
+        """
+        Transmits a frame to the remote radio. Raises RadioException if it could not be sent
+        :param data: Payload, str or bytes
+        :param wait: Wait until the frame was transmitted
+        :return: None
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    def set_remote_address(self, remote_address):
+        raise NotImplementedError
+
+    def _received(self, data):
+        if self.receive_callback is not None:
+            self.receive_callback(data)
+
+
+class XBeeTransport(Transport):
+    """
+    digi-xbee device on a serial port. digi-xbee and pyserial are only imported when the device is opened
+    """
+
+    def __init__(self, port, baud_rate, sync_ops_timeout=10):
+        super().__init__()
+        self.port = port
+        self.baud_rate = baud_rate
+        self.sync_ops_timeout = sync_ops_timeout
+        self.device = None
+        self.remote_device = None
+        self.remote_address = None
+
+    def open(self, remote_address):
+        import serial
+        from digi.xbee.devices import XBeeDevice, XBeeException
+
+        self.remote_address = remote_address
+        try:
+            self.device = XBeeDevice(self.port, self.baud_rate)
+            self.device.set_sync_ops_timeout(self.sync_ops_timeout)
+            self.device.open()
+        except serial.SerialException:
+            self.device = None
+            raise RadioSerialConnectionException()
+        except XBeeException as e:
+            self.device = None
+            raise RadioException(repr(e))
+
+        self.device.add_data_received_callback(lambda msg: self._received(msg.data))
+        self.set_remote_address(remote_address)
+
+    def close(self):
+        if self.device is not None:
+            self.device.close()
+            self.device = None
+
+    def is_open(self):
+        return self.device is not None and self.device.is_open()
+
+    def send(self, data, wait=True):
+        from digi.xbee.devices import XBeeException
+
+        if self.device is None or self.remote_device is None:
+            raise RadioException("Radio is not open")
+
+        try:
+            if wait:
+                self.device.send_data(self.remote_device, data)
+            else:
+                self.device.send_data_async(self.remote_device, data)
+        except XBeeException as e:
+            raise RadioException(repr(e))
+
+    def reset(self):
+        from digi.xbee.devices import XBeeException
+
+        if self.device is None:
+            self.open(self.remote_address)
+            return
+
+        try:
+            self.device.reset()
+        except XBeeException as e:
+            raise RadioException(repr(e))
+
+    def set_remote_address(self, remote_address):
+        from digi.xbee.devices import RemoteXBeeDevice, XBee64BitAddress
+
+        self.remote_address = remote_address
+        if self.device is not None:
+            self.remote_device = RemoteXBeeDevice(self.device, XBee64BitAddress.from_hex_string(remote_address))
+            print("Remote Device Address: " + str(self.remote_device))
+
+
+class LoopbackTransport(Transport):
+    """
+    Simulated radio link inside the process.
+
+    Each direction carries one frame at a time at baud_rate / 10 bytes per second, FRAME_OVERHEAD included, like a
+    serial link with 8N1 framing, and delivers it latency seconds after it was transmitted, unless it is lost. Frames
+    sent to the platform are kept in uplink and, with auto_ack, answered with an ack packet when they carry a command
+    id. Telemetry from the platform is sent with inject().
+    """
+
+    def __init__(self, baud_rate=9600, latency=0.02, loss=0.0, auto_ack=True, seed=None):
+        """
+        Init method
+        :param baud_rate: Serial baud rate the link is limited to
+        :param latency: Seconds between the end of a transmission and its delivery
+        :param loss: Probability a frame is lost
+        :param auto_ack: Acknowledge commands like the platform firmware
+        :param seed: Seed of the loss, for repeatable runs
+        """
+        super().__init__()
+        self.baud_rate = baud_rate
+        self.bytes_per_second = baud_rate / 10.0
+        self.latency = latency
+        self.loss = loss
+        self.auto_ack = auto_ack
+        self.random = random.Random(seed)
+
+        # Frames received by the simulated platform, and the callback it hands them to
+        self.uplink = []
+        self.on_uplink = None
+
+        self.sent = 0
+        self.lost = 0
+        self.delivered = 0
+
+        self.remote_address = None
+        self._open = False
+        self._order = 0
+        self._deliveries = []
+        # Time each direction is busy transmitting until
+        self._busy_until = {"up": 0.0, "down": 0.0}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def open(self, remote_address):
+        self.remote_address = remote_address
+        with self._condition:
+            if self._open:
+                return
+            self._open = True
+
+        self._thread = threading.Thread(target=self._run, name="LoopbackTransport", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        with self._condition:
+            self._open = False
+            self._condition.notify()
+
+    def is_open(self):
+        return self._open
+
+    def send(self, data, wait=True):
+        if not self._open:
+            raise RadioException("Radio is not open")
+
+        sent_at, lost = self._transmit("up", data)
+        if wait:
+            time.sleep(max(0.0, sent_at - time.monotonic()))
+            # A synchronous XBee send fails when the remote radio does not acknowledge the frame
+            if lost:
+                raise RadioException("Transmit failed, frame lost")
+
+    def inject(self, data):
+        """
+        Sends a frame from the simulated platform to the ground station. Safe to call from any thread
+        :param data: Payload, str or bytes
+        :return: None
+        """
+        if self._open:
+            self._transmit("down", data)
+
+    def reset(self):
+        with self._condition:
+            self._deliveries = []
+            self._busy_until = {"up": 0.0, "down": 0.0}
+
+    def set_remote_address(self, remote_address):
+        self.remote_address = remote_address
+
+    def _transmit(self, direction, data):
+        """
+        Schedules the delivery of a frame
+        :return: (time the transmission ends, whether the frame is lost)
+        """
+        with self._condition:
+            now = time.monotonic()
+            start = max(now, self._busy_until[direction])
+            sent_at = start + (len(data) + FRAME_OVERHEAD) / self.bytes_per_second
+            self._busy_until[direction] = sent_at
+
+            self.sent += 1
+            lost = self.random.random() < self.loss
+            if lost:
+                self.lost += 1
+            else:
+                self._order += 1
+                heapq.heappush(self._deliveries, (sent_at + self.latency, self._order, direction, data))
+                self._condition.notify()
+
+        return sent_at, lost
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._open:
+                    now = time.monotonic()
+                    if self._deliveries and self._deliveries[0][0] <= now:
+                        break
+                    timeout = self._deliveries[0][0] - now if self._deliveries else None
+                    self._condition.wait(timeout)
+
+                if not self._open:
+                    return
+                due, order, direction, data = heapq.heappop(self._deliveries)
+
+            self.delivered += 1
+            if direction == "down":
+                self._received(data)
+            else:
+                self._platform_received(data)
+
+    def _platform_received(self, data):
+        self.uplink.append(data)
+        if self.on_uplink is not None:
+            self.on_uplink(data)
+
+        if not self.auto_ack:
+            return
+
+        try:
+            command_id = json.loads(data).get("id")
+        except (ValueError, TypeError, AttributeError):
+            return
+
+        if command_id is not None:
+            ack = json.dumps({"origin": "ack", "id": command_id}, separators=(",", ":"))
+            self.inject(ack.encode("utf8"))
+
+
+def frame(data):
+    """
+    Wraps a payload in an XBee API style frame: start delimiter, 16 bit big endian length, payload, checksum
+    :param data: Payload, str or bytes
+    :return: bytes
+    """
+    if isinstance(data, str):
+        data = data.encode("utf8")
+    return bytes([START_DELIMITER, len(data) >> 8, len(data) & 0xFF]) + data + bytes([0xFF - (sum(data) & 0xFF)])
+
+
+class FrameReader:
+    """
+    Splits a byte stream into the payloads of frame() frames, skipping bytes that are not part of a valid frame
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk):
+        """
+        :param chunk: Bytes read from the stream
+        :return: List of complete payloads
+        """
+        self._buffer.extend(chunk)
+        payloads = []
+
+        while True:
+            start = self._buffer.find(START_DELIMITER)
+            if start < 0:
+                self._buffer.clear()
+                return payloads
+            del self._buffer[:start]
+
+            if len(self._buffer) < 3:
+                return payloads
+            length = self._buffer[1] << 8 | self._buffer[2]
+            if len(self._buffer) < length + 4:
+                return payloads
+
+            payload = bytes(self._buffer[3:3 + length])
+            if (sum(payload) + self._buffer[3 + length]) & 0xFF == 0xFF:
+                payloads.append(payload)
+                del self._buffer[:length + 4]
+            else:
+                # Not a frame, resynchronise on the next delimiter
+                del self._buffer[:1]
+
+
+class PtySerialTransport(Transport):
+    """
+    Frames over a pseudo terminal. The ground station holds the master side and the platform is simulated by any
+    program that opens port_path as a serial port and speaks frame()/FrameReader framing, e.g. SerialPeer. Writes are
+    paced to the baud rate. Unix only
+    """
+
+    def __init__(self, baud_rate=9600):
+        super().__init__()
+        self.baud_rate = baud_rate
+        self.bytes_per_second = baud_rate / 10.0
+        self.port_path = None
+        self.remote_address = None
+
+        self._master = None
+        self._slave = None
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def open(self, remote_address):
+        import pty
+        import tty
+
+        self.remote_address = remote_address
+        if self._master is not None:
+            return
+
+        self._master, self._slave = pty.openpty()
+        # Raw mode, so the line discipline does not translate or echo frame bytes
+        tty.setraw(self._slave)
+        self.port_path = os.ttyname(self._slave)
+        print("Simulated radio serial port: " + self.port_path)
+
+        self._thread = threading.Thread(target=self._run, args=(self._master,), name="PtySerialTransport",
+                                        daemon=True)
+        self._thread.start()
+
+    def close(self):
+        master, slave = self._master, self._slave
+        self._master = self._slave = None
+        for fd in (master, slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def is_open(self):
+        return self._master is not None
+
+    def send(self, data, wait=True):
+        if self._master is None:
+            raise RadioException("Radio is not open")
+
+        packet = frame(data)
+        with self._write_lock:
+            try:
+                os.write(self._master, packet)
+            except OSError as e:
+                raise RadioException(repr(e))
+
+            if wait:
+                time.sleep(len(packet) / self.bytes_per_second)
+
+    def reset(self):
+        pass
+
+    def set_remote_address(self, remote_address):
+        self.remote_address = remote_address
+
+    def _run(self, master):
+        reader = FrameReader()
+        while True:
+            try:
+                chunk = os.read(master, 4096)
+            except OSError:
+                return
+            if not chunk:
+                return
+
+            for payload in reader.feed(chunk):
+                self._received(payload)
+
+
+class SerialPeer:
+    """
+    Platform end of a PtySerialTransport, for test scripts
+    """
+
+    def __init__(self, port_path):
+        self.fd = os.open(port_path, os.O_RDWR | os.O_NOCTTY)
+        self._reader = FrameReader()
+        self._pending = []
+
+    def send(self, data):
+        os.write(self.fd, frame(data))
+
+    def receive(self, timeout=1.0):
+        """
+        :param timeout: Seconds to wait for a frame
+        :return: The next payload, or None
+        """
+        import select
+
+        deadline = time.monotonic() + timeout
+        while not self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+                return None
+            self._pending.extend(self._reader.feed(os.read(self.fd, 4096)))
+
+        return self._pending.pop(0)
+
+    def close(self):
+        os.close(self.fd)
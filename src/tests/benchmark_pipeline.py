@@ -0,0 +1,375 @@
+"""
+Headless benchmark of the telemetry receive pipeline.
+
+Runs without a display or radio: a LoadGenerator stream goes through a stand-in for the radio receive callback, the
+TelemetryDecoder thread, a consumer doing what DataWindow.process_incoming does to the GUI state, the graph buffers
+and an off-screen BlitRenderer, and the FlightRecorder. Every rate is run for a fixed time and reported with its
+throughput, per-stage latency percentiles, backlog and memory growth.
+
+    python3 src/tests/benchmark_pipeline.py --rates 100,1000,5000 --output before.json
+    python3 src/tests/benchmark_pipeline.py --rates 100,1000,5000 --output after.json --compare before.json
+    python3 src/tests/benchmark_pipeline.py --rates 100 --burst-period 2 --burst-length 0.5 --burst-factor 20
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from BlitRenderer import BlitRenderer
+import Downsample
+from FlightRecorder import FlightRecorder
+from IngestScheduler import IngestQueue, INGEST_BUDGET, IDLE_POLL
+from LoadGenerator import LoadGenerator
+from TelemetryDecoder import TelemetryDecoder
+from TelemetryHistory import TelemetryHistory
+from communications import PacketFormat
+from communications.LinkStats import LinkStats
+
+# Same as DataWindow
+GRAPH_HISTORY_LENGTH = 4000
+GRAPH_HISTORY_LEVELS = 3
+GRAPH_POINTS = 400
+GRAPH_MAX_FPS = 10
+
+PERCENTILES = (50, 95, 99)
+
+# Frames of records the queue may hold at the end of a run for the pipeline to count as keeping up. Records wait at
+# most for a frame and an ingest pass, anything beyond that is a backlog that grows
+KEEPS_UP_FRAMES = 2
+
+
+def percentiles(samples):
+    """
+    :param samples: Sequence of durations in seconds
+    :return: dict of milliseconds per percentile, plus the sample count
+    """
+    result = {"count": len(samples)}
+    if len(samples):
+        values = np.percentile(np.asarray(samples) * 1000.0, PERCENTILES)
+        for p, value in zip(PERCENTILES, values):
+            result["p" + str(p) + "_ms"] = round(float(value), 4)
+    return result
+
+
+def rss():
+    """
+    :return: Resident set size of this process in bytes, None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class Consumer:
+    """
+    Tk thread stand-in: woken by the record queue like the IngestScheduler, it drains the queue an INGEST_BUDGET at a
+    time like DataWindow.process_incoming, with a safety poll every IDLE_POLL, and repaints the graphs from the
+    history at most GRAPH_MAX_FPS times a second like the RenderScheduler
+    """
+
+    def __init__(self, record_queue, link_stats):
+        self.queue = record_queue
+        self.link_stats = link_stats
+        self.history = TelemetryHistory(GRAPH_HISTORY_LENGTH, GRAPH_HISTORY_LEVELS)
+        self.latest = {}
+
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        altitude = figure.add_subplot(311)
+        acc = figure.add_subplot(312)
+        gyro = figure.add_subplot(313)
+        self.renderer = BlitRenderer(figure)
+        self.renderer.add_line(altitude, "c")
+        for axes in (acc, gyro):
+            for color in ("y", "c", "m"):
+                self.renderer.add_line(axes, color)
+
+        self.consumed = 0
+        self.passes = 0
+        self.carried_over = 0
+        self.queue_latency = []
+        self.batch_time = []
+        self.render_time = []
+
+        self.running = False
+        self._dirty = False
+
+        # Wake ups of the queue, the event the IngestScheduler posts to the Tk loop
+        self._wake = threading.Event()
+        self.queue.listener = self._wake.set
+        self.thread = threading.Thread(target=self._run, name="Consumer", daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.queue.listener = None
+        self._wake.set()
+        self.thread.join()
+
+    def _run(self):
+        next_render = 0.0
+        more = False
+        while self.running:
+            # A pass that ran out of budget continues at once, Tk would only handle pending events in between
+            if not more:
+                next_wake = IDLE_POLL
+                if self._dirty:
+                    next_wake = min(next_wake, max(next_render - time.monotonic(), 0.0))
+                self._wake.wait(next_wake)
+                self._wake.clear()
+
+            self.passes += 1
+            more = self.process_incoming(time.perf_counter() + INGEST_BUDGET)
+            if more:
+                self.carried_over += 1
+
+            now = time.monotonic()
+            if self._dirty and now >= next_render:
+                start = time.perf_counter()
+                self.render()
+                self.render_time.append(time.perf_counter() - start)
+                self._dirty = False
+                next_render = now + 1.0 / GRAPH_MAX_FPS
+
+    def process_incoming(self, deadline):
+        """
+        :param deadline: time.perf_counter() value to stop at
+        :return: True if records were left in the queue
+        """
+        start = time.perf_counter()
+        received = False
+        more = False
+
+        while self.queue.qsize():
+            if time.perf_counter() >= deadline:
+                more = True
+                break
+
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            received = True
+            self.queue_latency.append(time.time() - record.received)
+            self.consumed += 1
+
+            # The labels' state, without the widgets
+            self.latest[record.origin] = record
+            if record.origin == "status":
+                continue
+
+            self.history.append(record)
+            self._dirty = True
+
+        if received:
+            self.link_stats.received_percentage()
+            self.batch_time.append(time.perf_counter() - start)
+        return more
+
+    def render(self):
+        # What PlotPanel.update does in the whole flight view, for the altitude and direction panels
+        x_values = []
+        values = []
+        for field in ("altitude", "acc_x", "acc_y", "acc_z", "gyro_x", "gyro_y", "gyro_z"):
+            times, low, mean, high = self.history.window("balloon", field)
+            if not len(times):
+                continue
+            x = np.repeat(times - times[0], 2)
+            y = np.empty(len(x))
+            y[0::2] = low
+            y[1::2] = high
+            indices, y = Downsample.downsample(y, GRAPH_POINTS)
+            x_values.append(x[indices])
+            values.append(y)
+        self.renderer.update(values, x_values)
+
+
+def run(rate, duration, packet_format, log_folder, burst_period=0.0, burst_length=0.0, burst_factor=1.0):
+    """
+    Runs the pipeline at one balloon packet rate, with a rocket stream at a quarter of it and 1 Hz status
+    :param burst_period: Seconds between the starts of two bursts, 0 disables bursts
+    :param burst_length: Seconds a burst lasts
+    :param burst_factor: Multiplier of every rate during a burst
+    :return: dict of results
+    """
+    raw_queue = queue.Queue()
+    record_queue = IngestQueue()
+    link_stats = LinkStats()
+    recorder = FlightRecorder(os.path.join(log_folder, "benchmark-" + str(rate) + ".bin"))
+    decoder = TelemetryDecoder(raw_queue, record_queue, link_stats, recorder=recorder)
+    consumer = Consumer(record_queue, link_stats)
+
+    # What RadioModule's data_receive_callback does with every frame
+    def receive_callback(data):
+        raw_queue.put((data, time.time()))
+
+    generator = LoadGenerator(receive_callback, lambda record: PacketFormat.encode(record, packet_format),
+                              balloon_rate=rate, rocket_rate=rate / 4.0, status_rate=1.0,
+                              burst_period=burst_period, burst_length=burst_length, burst_factor=burst_factor,
+                              seed=rate)
+
+    gc.collect()
+    rss_before = rss()
+
+    recorder.start()
+    decoder.start()
+    consumer.start()
+
+    start = time.perf_counter()
+    generator.start()
+    max_backlog = 0
+    while time.perf_counter() - start < duration:
+        time.sleep(0.05)
+        max_backlog = max(max_backlog, raw_queue.qsize() + record_queue.qsize())
+    generator.stop()
+    generator.thread.join()
+    elapsed = time.perf_counter() - start
+
+    backlog = raw_queue.qsize() + record_queue.qsize()
+
+    # Let the pipeline drain what was generated, up to a limit
+    drain_start = time.perf_counter()
+    while consumer.consumed < generator.sent and time.perf_counter() - drain_start < duration:
+        time.sleep(0.05)
+    drain_time = time.perf_counter() - drain_start
+
+    consumer.stop()
+    decoder.stop()
+    decoder.thread.join()
+    recorder.stop()
+    rss_after = rss()
+
+    result = {
+        "rate": rate,
+        "duration_s": round(elapsed, 3),
+        "generated": generator.sent,
+        "consumed": consumer.consumed,
+        "rejected": decoder.rejected,
+        "throughput_pps": round(consumer.consumed / (elapsed + drain_time), 1),
+        "backlog_at_end": backlog,
+        "max_backlog": max_backlog,
+        "drain_s": round(drain_time, 3),
+        "ingest_passes": consumer.passes,
+        "ingest_carried_over": consumer.carried_over,
+        "generator_lag_s": round(generator.lag, 4),
+        "latency": {
+            "receive_to_consume": percentiles(consumer.queue_latency),
+            "process_incoming_batch": percentiles(consumer.batch_time),
+            "graph_render": percentiles(consumer.render_time),
+        },
+        "recorder": {"written": recorder.written, "dropped": recorder.dropped, "bytes": recorder.bytes_written},
+        "rss_growth_bytes": None if rss_before is None else rss_after - rss_before,
+    }
+    # Records that arrive during one frame and the ingest pass after it, balloon and rocket
+    frame = (1.0 / GRAPH_MAX_FPS + INGEST_BUDGET) * rate * 1.25
+    result["keeps_up"] = backlog <= max(frame * KEEPS_UP_FRAMES, 1) and recorder.dropped == 0
+    return result
+
+
+def decode_cost(packet_format, count=20000):
+    """
+    :return: Mean microseconds to decode one balloon packet
+    """
+    generator = LoadGenerator(None, None, seed=0)
+    packets = [PacketFormat.encode(generator.record("balloon"), packet_format) for i in range(1000)]
+    if packet_format == PacketFormat.JSON:
+        packets = [packet.decode("utf8") for packet in packets]
+
+    start = time.perf_counter()
+    for i in range(count):
+        PacketFormat.decode(packets[i % len(packets)], 0.0)
+    return round((time.perf_counter() - start) / count * 1e6, 3)
+
+
+def compare(results, baseline):
+    """
+    Prints the change of the main figures against an earlier result file
+    """
+    old_runs = {run["rate"]: run for run in baseline["runs"]}
+    print("\nCompared to " + baseline.get("started", "baseline"))
+    for new in results["runs"]:
+        old = old_runs.get(new["rate"])
+        if old is None:
+            continue
+
+        print("rate " + str(new["rate"]) + ":")
+        print("  throughput   %10.1f -> %10.1f pps" % (old["throughput_pps"], new["throughput_pps"]))
+        for stage, values in new["latency"].items():
+            before = old["latency"].get(stage, {})
+            if "p95_ms" in values and "p95_ms" in before:
+                print("  %-22s p95 %8.3f -> %8.3f ms" % (stage, before["p95_ms"], values["p95_ms"]))
+
+    for packet_format, cost in results["decode_us"].items():
+        if packet_format in baseline.get("decode_us", {}):
+            print("decode %-6s %8.3f -> %8.3f us" % (packet_format, baseline["decode_us"][packet_format], cost))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless telemetry pipeline benchmark")
+    parser.add_argument("--rates", default="10,100,1000",
+                        help="comma separated balloon packet rates to run, packets per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per rate")
+    parser.add_argument("--format", default=PacketFormat.BINARY, choices=(PacketFormat.BINARY, PacketFormat.JSON),
+                        help="packet encoding of the stream")
+    parser.add_argument("--burst-period", type=float, default=0.0,
+                        help="seconds between the starts of two bursts, 0 disables bursts")
+    parser.add_argument("--burst-length", type=float, default=0.0, help="seconds a burst lasts")
+    parser.add_argument("--burst-factor", type=float, default=1.0, help="multiplier of every rate during a burst")
+    parser.add_argument("--output", default="benchmark.json", help="result file")
+    parser.add_argument("--compare", help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    results = {
+        "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "format": args.format,
+        "bursts": {"period_s": args.burst_period, "length_s": args.burst_length, "factor": args.burst_factor},
+        "decode_us": {PacketFormat.BINARY: decode_cost(PacketFormat.BINARY),
+                      PacketFormat.JSON: decode_cost(PacketFormat.JSON)},
+        "runs": [],
+    }
+
+    log_folder = tempfile.mkdtemp()
+    try:
+        for rate in [float(rate) for rate in args.rates.split(",")]:
+            result = run(rate, args.duration, args.format, log_folder,
+                         args.burst_period, args.burst_length, args.burst_factor)
+            results["runs"].append(result)
+            latency = result["latency"]["receive_to_consume"]
+            print("balloon rate %8.0f pps: %8.1f pps consumed, backlog %6d, receive->consume p95 %8.2f ms, %s" % (
+                rate, result["throughput_pps"], result["backlog_at_end"], latency.get("p95_ms", float("nan")),
+                "keeps up" if result["keeps_up"] else "FALLS BEHIND"))
+    finally:
+        shutil.rmtree(log_folder)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Results saved to " + args.output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ from .. import ReadLog
 
 from digi.xbee.devices import XBeeDevice, XBee64BitAddress, RemoteXBeeDevice, XBeeException
 
+from Telemetry import FlightRecord
+from communications import PacketFormat
+
 # Local port number:
 # - For linux, it will be '/dev/ttyS#'
 # - For windows, it will be 'COM#'
@@ -20,6 +23,9 @@ BAUD_RATE = 9600
 # Remote node MAC address in hexadecimal format
 REMOTE_NODE_ADDRESS = '0013A20040F6E10C'
 
+# Telemetry encoding to send, PacketFormat.BINARY or PacketFormat.JSON
+PACKET_FORMAT = PacketFormat.BINARY
+
 class RadioTest:
     def __init__(self):
         self.device = XBeeDevice(LOCAL_PORT, BAUD_RATE)
@@ -44,8 +50,8 @@ class RadioTest:
             else:
                 origin = "rocket"
 
-
-            data = '{\"origin\":\"' + origin + '\",\"alt\":' + str(i) + ',\"GPS\":{\"long\":10,\"lat\":10},\"gyro\":{\"x\":10,\"y\":10,\"z\":' + str(i) + '},\"mag\": '+ str(i) + ',\"temp\": '+ str(i) +',\"acc\":{\"x\":10,\"y\":10,\"z\":10}}'
+            record = FlightRecord(origin, i, None, i, 10, 10, i, 10, 10, 10, 10, 10, i)
+            data = PacketFormat.encode(record, PACKET_FORMAT)
 
             print(data)
 
@@ -43,6 +43,24 @@ class RadioObjectException(RadioException):
     #     super().__init__(message)
 
 
+class TelemetryDecodeException(GroundStationException):
+    """
+    This exception will be thrown if a received packet cannot be parsed or fails validation.
+    All functionality of this class is the inherited of `Exception
+    <https://docs.python.org/2/library/exceptions.html?highlight=exceptions.exception#exceptions.Exception>`_.
+    """
+    pass
+
+
+class FlightLogException(GroundStationException):
+    """
+    This exception will be thrown if a flight log cannot be opened or is not a flight log.
+    All functionality of this class is the inherited of `Exception
+    <https://docs.python.org/2/library/exceptions.html?highlight=exceptions.exception#exceptions.Exception>`_.
+    """
+    pass
+
+
 class QueueException(GroundStationException):
     """
     This exception will be thrown if there is a problem with the data queue for the display and logging of all data.